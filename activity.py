@@ -0,0 +1,96 @@
+import datetime as dt
+
+import numpy as np
+
+from fit_decoder import FIT_EPOCH, RECORD_CHANNELS
+
+# Fehlwerte in den schmalen Arrays (identisch mit den FIT-Invalid-Werten)
+POWER_INVALID = RECORD_CHANNELS["power"][3]
+HR_INVALID = RECORD_CHANNELS["heart_rate"][3]
+CADENCE_INVALID = RECORD_CHANNELS["cadence"][3]
+
+
+class Activity:
+    """Kompakte Darstellung einer Fahrt auf schmalen, typisierten Arrays.
+
+    Statt eines DataFrames mit allen FIT-Feldern als float64/object:
+    ``power`` uint16, ``heart_rate``/``cadence`` uint8, ``t`` int32 Sekunden
+    relativ zu ``start`` (Unix-Zeit). Eine 2-h-Fahrt belegt damit ~58 KB.
+
+    Die Array-Attribute sind direkt nutzbar (z. B. ``mmp.mmp_curve(a.power)``);
+    ``*_valid()`` liefert nur die gültigen Werte, ``power_f64()`` eine
+    float-Sicht ohne Fehlwerte für Code, der NaN erwartet.
+    """
+
+    __slots__ = ("key", "name", "start", "t", "power", "heart_rate", "cadence")
+
+    def __init__(self, t, power, heart_rate=None, cadence=None, start=0, key=None, name=None):
+        n = len(power)
+        self.t = np.asarray(t, dtype=np.int32)
+        self.power = np.asarray(power, dtype=np.uint16)
+        self.heart_rate = np.full(n, HR_INVALID, dtype=np.uint8) if heart_rate is None else np.asarray(heart_rate, dtype=np.uint8)
+        self.cadence = np.full(n, CADENCE_INVALID, dtype=np.uint8) if cadence is None else np.asarray(cadence, dtype=np.uint8)
+        if not (len(self.t) == len(self.heart_rate) == len(self.cadence) == n):
+            raise ValueError("Alle Kanäle müssen gleich lang sein")
+        self.start = int(start)
+        self.key = key
+        self.name = name
+
+    @classmethod
+    def from_streams(cls, streams, key=None, name=None):
+        """Aus ``fit_decoder.decode_fit``-Streams (FIT-Zeitstempel uint32)."""
+        ts = streams.get("timestamp")
+        n = len(streams["power"])
+        if ts is None or not (ts != RECORD_CHANNELS["timestamp"][3]).any():
+            start, t = 0, np.arange(n, dtype=np.int32)
+        else:
+            valid = ts != RECORD_CHANNELS["timestamp"][3]
+            first = int(ts[valid][0])
+            # Fehlende Zeitstempel übernehmen den letzten gültigen
+            idx = np.maximum.accumulate(np.where(valid, np.arange(n), -1))
+            idx[idx < 0] = np.argmax(valid)
+            t = (ts[idx].astype(np.int64) - first).astype(np.int32)
+            start = first + FIT_EPOCH
+        return cls(t, streams["power"], streams.get("heart_rate"), streams.get("cadence"), start=start, key=key, name=name)
+
+    def __len__(self):
+        return len(self.power)
+
+    def __repr__(self):
+        return f"Activity(name={self.name!r}, samples={len(self)}, dauer={self.duration}s)"
+
+    @property
+    def duration(self):
+        return int(self.t[-1]) + 1 if len(self.t) else 0
+
+    @property
+    def date(self):
+        return dt.datetime.fromtimestamp(self.start, tz=dt.timezone.utc).date() if self.start else None
+
+    @property
+    def nbytes(self):
+        return self.t.nbytes + self.power.nbytes + self.heart_rate.nbytes + self.cadence.nbytes
+
+    def timestamps(self):
+        # Absolute Unix-Sekunden (int64)
+        return self.t.astype(np.int64) + self.start
+
+    def power_valid(self):
+        return self.power[self.power != POWER_INVALID]
+
+    def heart_rate_valid(self):
+        hr = self.heart_rate
+        return hr[(hr != HR_INVALID) & (hr > 0)]
+
+    def cadence_valid(self):
+        return self.cadence[self.cadence != CADENCE_INVALID]
+
+    def power_f64(self):
+        p = self.power.astype(np.float64)
+        p[self.power == POWER_INVALID] = np.nan
+        return p
+
+    def to_streams(self):
+        """Zurück in das Stream-Dict des Decoders (z. B. für den Aktivitäts-Cache)."""
+        ts = (self.t.astype(np.int64) + self.start - FIT_EPOCH).astype(np.uint32) if self.start else np.full(len(self), RECORD_CHANNELS["timestamp"][3], dtype=np.uint32)
+        return {"timestamp": ts, "power": self.power, "heart_rate": self.heart_rate, "cadence": self.cadence}
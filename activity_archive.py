@@ -0,0 +1,218 @@
+"""Append-only, spaltenweises Archiv vieler Fahrten mit Memory-Mapping.
+
+Layout eines Archiv-Verzeichnisses::
+
+    t.i32  power.u16  heart_rate.u8  cadence.u8   # alle Fahrten hintereinander
+    index.bin                                     # ein Eintrag pro Fahrt (Offset, Länge, …)
+
+Leser mappen die Kanaldateien nur (``np.memmap``); MMP-, Zonen- und
+Verlaufsabfragen lesen damit ausschließlich die Slices der betroffenen Fahrten.
+
+Import von FIT-Dateien::
+
+    python activity_archive.py import /data/archiv/team /data/fit/**/*.fit --athlet "Anna"
+"""
+import argparse
+import datetime as dt
+import os
+import sys
+import threading
+
+import numpy as np
+
+from activity import Activity
+
+try:
+    import fcntl
+except ImportError:  # Windows: nur prozessinterne Sperre
+    fcntl = None
+
+DEFAULT_ARCHIVE_DIR = os.environ.get("POWERPROFILE_ARCHIVE_DIR", os.path.join(os.path.expanduser("~"), ".local", "share", "powerprofile", "archiv"))
+
+CHANNELS = {
+    "t": ("t.i32", np.int32),
+    "power": ("power.u16", np.uint16),
+    "heart_rate": ("heart_rate.u8", np.uint8),
+    "cadence": ("cadence.u8", np.uint8),
+}
+
+INDEX_DTYPE = np.dtype([
+    ("key", "S64"),
+    ("athlete", "S64"),
+    ("name", "S96"),
+    ("start", "<i8"),
+    ("offset", "<i8"),
+    ("length", "<i8"),
+])
+
+
+class ActivityArchive:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index = None
+        self._maps = {}
+        self._mapped_len = -1
+
+    # --- Lesen ---
+
+    def _index_path(self):
+        return os.path.join(self.path, "index.bin")
+
+    @property
+    def index(self):
+        """Strukturiertes Array aller Einträge (wird bei Wachstum neu gemappt)."""
+        path = self._index_path()
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        n = size // INDEX_DTYPE.itemsize
+        if self._index is None or len(self._index) != n:
+            self._index = np.memmap(path, dtype=INDEX_DTYPE, mode="r", shape=(n,)) if n else np.empty(0, dtype=INDEX_DTYPE)
+        return self._index
+
+    def __len__(self):
+        return len(self.index)
+
+    def _channel(self, name):
+        index = self.index
+        total = int(index["offset"][-1] + index["length"][-1]) if len(index) else 0
+        if total != self._mapped_len:
+            self._maps = {}
+            for ch, (fname, dtype) in CHANNELS.items():
+                path = os.path.join(self.path, fname)
+                self._maps[ch] = np.memmap(path, dtype=dtype, mode="r", shape=(total,)) if total else np.empty(0, dtype=dtype)
+            self._mapped_len = total
+        return self._maps[name]
+
+    def get(self, i):
+        """Fahrt ``i`` als ``Activity``; die Arrays sind Views auf die gemappten Dateien."""
+        rec = self.index[i]
+        a, b = int(rec["offset"]), int(rec["offset"] + rec["length"])
+        return Activity(
+            self._channel("t")[a:b], self._channel("power")[a:b],
+            self._channel("heart_rate")[a:b], self._channel("cadence")[a:b],
+            start=int(rec["start"]), key=rec["key"].decode(), name=rec["name"].decode(errors="replace"),
+        )
+
+    def channel_slice(self, i, channel):
+        # Nur einen Kanal einer Fahrt lesen (z. B. "power" für MMP)
+        rec = self.index[i]
+        return self._channel(channel)[int(rec["offset"]):int(rec["offset"] + rec["length"])]
+
+    def select(self, athlete=None, since=None, until=None):
+        """Indizes der Fahrten eines Athleten und/oder Datumsbereichs (``datetime.date``)."""
+        index = self.index
+        mask = np.ones(len(index), dtype=bool)
+        if athlete is not None:
+            mask &= index["athlete"] == str(athlete).encode()[:64]
+        if since is not None:
+            mask &= index["start"] >= _unix(since)
+        if until is not None:
+            mask &= index["start"] < _unix(until + dt.timedelta(days=1))
+        return np.flatnonzero(mask)
+
+    def contains(self, key):
+        return bool((self.index["key"] == key.encode()).any())
+
+    def athletes(self):
+        return sorted({a.decode(errors="replace") for a in np.unique(self.index["athlete"]) if a})
+
+    # --- Schreiben ---
+
+    def append(self, activity, athlete=""):
+        """Hängt eine Fahrt an; gibt ihren Index zurück (bestehenden, falls ``key`` schon vorhanden)."""
+        key = (activity.key or "").encode()
+        with self._lock, _FileLock(os.path.join(self.path, ".lock")):
+            self._index = None
+            index = self.index
+            if key:
+                hit = np.flatnonzero(index["key"] == key)
+                if len(hit):
+                    return int(hit[0])
+            offset = int(index["offset"][-1] + index["length"][-1]) if len(index) else 0
+            n = len(activity)
+            for ch, (fname, dtype) in CHANNELS.items():
+                path = os.path.join(self.path, fname)
+                with open(path, "ab") as f:
+                    # Reste eines abgebrochenen Schreibvorgangs abschneiden
+                    f.truncate(offset * np.dtype(dtype).itemsize)
+                    f.write(np.ascontiguousarray(getattr(activity, ch), dtype=dtype).tobytes())
+            rec = np.zeros(1, dtype=INDEX_DTYPE)
+            rec["key"] = key
+            rec["athlete"] = str(athlete).encode()[:64]
+            rec["name"] = (activity.name or "").encode()[:96]
+            rec["start"] = activity.start
+            rec["offset"] = offset
+            rec["length"] = n
+            # Der Indexeintrag wird zuletzt geschrieben: erst danach ist die Fahrt sichtbar
+            with open(self._index_path(), "ab") as f:
+                f.write(rec.tobytes())
+            self._index = None
+            return len(index)
+
+
+def _unix(date):
+    return int(dt.datetime(date.year, date.month, date.day, tzinfo=dt.timezone.utc).timestamp())
+
+
+class _FileLock:
+    # Prozessübergreifende Schreibsperre (flock), damit mehrere Apps/Jobs anhängen können
+    def __init__(self, path):
+        self.path = path
+        self.f = None
+
+    def __enter__(self):
+        self.f = open(self.path, "a")
+        if fcntl is not None:
+            fcntl.flock(self.f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.f, fcntl.LOCK_UN)
+        self.f.close()
+
+
+def main(argv=None):
+    from batch_analyse import iter_fit_files
+    from parallel_ingest import ingest_files
+
+    parser = argparse.ArgumentParser(description="Aktivitäts-Archiv verwalten")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_import = sub.add_parser("import", help="FIT-Dateien dekodieren und anhängen")
+    p_import.add_argument("archiv")
+    p_import.add_argument("inputs", nargs="+")
+    p_import.add_argument("--athlet", default="")
+    p_import.add_argument("--workers", type=int, default=None)
+    p_import.add_argument("--block", type=int, default=200, help="Dateien pro Pool-Durchlauf")
+    p_info = sub.add_parser("info", help="Inhalt anzeigen")
+    p_info.add_argument("archiv")
+    args = parser.parse_args(argv)
+
+    archive = ActivityArchive(args.archiv)
+    if args.cmd == "info":
+        print(f"{len(archive)} Fahrten, Athleten: {', '.join(archive.athletes()) or '-'}")
+        return 0
+
+    paths = list(iter_fit_files(args.inputs))
+    neu = fehler = 0
+    for i in range(0, len(paths), args.block):
+        block = []
+        for p in paths[i:i + args.block]:
+            with open(p, "rb") as f:
+                block.append((p, f.read()))
+        for name, activity, err in ingest_files(block, max_workers=args.workers):
+            if activity is None:
+                fehler += 1
+                print(f"Fehler: {name}: {err}", file=sys.stderr)
+                continue
+            before = len(archive)
+            archive.append(Activity.from_streams(activity["streams"], key=activity["key"], name=os.path.basename(name)), args.athlet)
+            neu += len(archive) > before
+        print(f"\r{min(i + args.block, len(paths))}/{len(paths)} Dateien", end="", file=sys.stderr)
+    print(f"\n{neu} neue Fahrten, {fehler} Fehler -> {args.archiv}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
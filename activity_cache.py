@@ -0,0 +1,215 @@
+import hashlib
+import io
+import os
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from fit_decoder import DEFAULT_CHANNELS, decode_fit, power_values
+from mmp import mmp_curve
+
+# Cache-Verzeichnis kann per Umgebungsvariable umgelegt werden (z. B. auf ein Volume)
+DEFAULT_CACHE_DIR = os.environ.get("POWERPROFILE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "powerprofile"))
+DEFAULT_MAX_MEMORY_MB = 256
+DEFAULT_MAX_DISK_MB = 2048
+
+# Version des Cache-Formats: bei inkompatiblen Änderungen erhöhen, alte Einträge werden dann ignoriert
+CACHE_VERSION = 1
+
+
+def file_hash(data):
+    # SHA-256 über die Rohbytes der FIT-Datei
+    return hashlib.sha256(data).hexdigest()
+
+
+def _entry_nbytes(entry):
+    return sum(a.nbytes for a in entry["streams"].values()) + entry["curve"].nbytes
+
+
+class ActivityCache:
+    """Zweistufiger Cache für dekodierte Fahrten (Streams + MMP-Kurve).
+
+    Schlüssel ist der SHA-256 der Dateibytes, d. h. dieselbe Fahrt wird nie
+    zweimal dekodiert – weder bei einem Streamlit-Rerun (Speicher) noch in
+    einer späteren Sitzung (Festplatte, ``.npz``). Beide Stufen sind in der
+    Größe begrenzt und verdrängen nach LRU.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_memory_mb=DEFAULT_MAX_MEMORY_MB, max_disk_mb=DEFAULT_MAX_DISK_MB):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = int(max_memory_mb * 1e6)
+        self.max_disk_bytes = int(max_disk_mb * 1e6)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits_memory = self.hits_disk = self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # --- Speicher-Stufe ---
+
+    def _memory_get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _memory_put(self, key, entry):
+        size = _entry_nbytes(entry)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= _entry_nbytes(old)
+            self._memory[key] = entry
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= _entry_nbytes(evicted)
+
+    # --- Festplatten-Stufe ---
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _disk_get(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path) as npz:
+                if int(npz["version"]) != CACHE_VERSION:
+                    return None
+                entry = {
+                    "streams": {name[len("s_"):]: npz[name] for name in npz.files if name.startswith("s_")},
+                    "curve": npz["curve"],
+                }
+            os.utime(path)  # mtime dient als LRU-Zeitstempel
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile, zlib.error):
+            # Abgeschnittener/defekter Eintrag (z. B. Abbruch beim Schreiben): als Miss werten und entfernen
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _disk_put(self, key, entry):
+        if not self.cache_dir:
+            return
+        arrays = {f"s_{name}": arr for name, arr in entry["streams"].items()}
+        buf = io.BytesIO()
+        np.savez_compressed(buf, version=np.int32(CACHE_VERSION), curve=entry["curve"], **arrays)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(buf.getvalue())
+        os.replace(tmp, path)  # atomar, auch bei parallelen Prozessen
+        self._disk_evict()
+
+    def _disk_evict(self):
+        files = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st_ = os.stat(path)
+            except OSError:
+                continue
+            files.append((st_.st_mtime, st_.st_size, path))
+            total += st_.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    # --- öffentliche API ---
+
+    def get(self, key):
+        entry = self._memory_get(key)
+        if entry is not None:
+            self.hits_memory += 1
+            return entry
+        entry = self._disk_get(key)
+        if entry is not None:
+            self.hits_disk += 1
+            self._memory_put(key, entry)
+        else:
+            self.misses += 1
+        return entry
+
+    def stats(self):
+        # Treffer (Speicher/Festplatte), Fehlschläge und belegter Speicher
+        return {"hits_memory": self.hits_memory, "hits_disk": self.hits_disk, "misses": self.misses,
+                "entries": len(self._memory), "mb": self._memory_bytes / 1e6}
+
+    def put(self, key, entry, disk=True):
+        self._memory_put(key, entry)
+        if disk:
+            self._disk_put(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+def analyse_bytes(data):
+    # Dekodieren + MMP-Kurve, ohne Cache
+    streams = decode_fit(data, DEFAULT_CHANNELS)
+    return {"streams": streams, "curve": mmp_curve(power_values(streams))}
+
+
+_default_cache = None
+
+
+def get_cache():
+    # Prozessweiter Cache: Module bleiben über Streamlit-Reruns hinweg geladen
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ActivityCache()
+    return _default_cache
+
+
+def load_activity(source, cache=None):
+    """Dekodierte Fahrt für ``source`` (Bytes oder Upload), aus dem Cache falls vorhanden.
+
+    Rückgabe: ``{"key", "streams", "curve"}``; ``curve[d - 1]`` ist die
+    Bestleistung über ``d`` Sekunden.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    else:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        data = source.read()
+    cache = cache or get_cache()
+    key = file_hash(data)
+    entry = cache.get(key)
+    if entry is None:
+        entry = analyse_bytes(data)
+        cache.put(key, entry)
+    return {"key": key, **entry}
+
+
+def best_from_curve(curve, durations):
+    # Bestwerte für feste Dauern aus der gecachten Kurve (NaN, wenn die Fahrt zu kurz ist)
+    return {d: float(curve[d - 1]) if 0 < d <= len(curve) else np.nan for d in durations}
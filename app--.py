@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from fitparse import FitFile
-from sklearn.linear_model import LinearRegression
+from fit_decoder import decode_fit, power_values, heart_rate_values
+from profile_metrics import estimate_cp_model
 
 st.title("🚴 Erweiterte Leistungsanalyse aus FIT-Dateien")
 
@@ -18,35 +18,12 @@ geschlecht_code = 1 if geschlecht.lower() == "frau" else 0
 
 durations = [20, 30, 60, 180, 240, 300, 600, 720, 900, 1200, 1800]
 
-def extract_series(fitfile):
-    power_data = []
-    for record in fitfile.get_messages("record"):
-        power = record.get_value("power")
-        if power is not None:
-            power_data.append(power)
-    return power_data
-
 def best_avg(series, duration):
     if len(series) >= duration:
         rolling = np.convolve(series, np.ones(duration), 'valid') / duration
         return max(rolling)
     return np.nan
 
-def estimate_cp_model(power_dict):
-    durations_min = []
-    power_values = []
-    for d, p in power_dict.items():
-        if not np.isnan(p) and d >= 180:  # nur ab 3min sinnvoll für CP
-            durations_min.append(d / 60)
-            power_values.append(p)
-    if len(durations_min) < 2:
-        return np.nan  # nicht genug Daten
-    inv_t = 1 / np.array(durations_min)
-    P = np.array(power_values)
-    model = LinearRegression().fit(inv_t.reshape(-1,1), P)
-    cp = model.intercept_
-    return cp
-
 def estimate_vo2max_5min(power_300, weight):
     # VO2max (absolut): VO2 [L/min] ≈ 0.01141 × P5min + 0.435
     if np.isnan(power_300): return np.nan, np.nan
@@ -68,9 +45,12 @@ def estimate_vlamax(ffm, duration, avg, peak, geschlecht_code):
 if uploaded_files:
     all_best = []
     peak_watts = []
+    all_streams = []
     for file in uploaded_files:
-        fitfile = FitFile(file)
-        power_series = extract_series(fitfile)
+        # Ein Durchlauf liefert alle Kanäle (Leistung, HF, Zeitstempel)
+        streams = decode_fit(file, ("timestamp", "power", "heart_rate"))
+        all_streams.append(streams)
+        power_series = power_values(streams)
         peak_watts.append(max(power_series) if len(power_series) > 0 else np.nan)
         best = {dur: best_avg(power_series, dur) for dur in durations}
         all_best.append(best)
@@ -121,14 +101,12 @@ if uploaded_files:
         st.subheader("❤️ Herzfrequenzbasierte Zonen (falls verfügbar)")
         hr_all = []
         hr_max = 0
-        for file in uploaded_files:
-            fitfile = FitFile(file)
-            for record in fitfile.get_messages("record"):
-                hr = record.get_value("heart_rate")
-                if hr:
-                    hr_all.append(hr)
-                    if hr > hr_max:
-                        hr_max = hr
+        # Herzfrequenz stammt aus demselben Dekodier-Durchlauf wie die Leistung
+        for streams in all_streams:
+            hr = heart_rate_values(streams)
+            if len(hr) > 0:
+                hr_all.append(hr)
+                hr_max = max(hr_max, int(hr.max()))
 
         if hr_max > 0:
             hr_zones = {
@@ -1,10 +1,15 @@
 
+import startup_timing
 import streamlit as st
 import pandas as pd
 import numpy as np
-import io
-from fitparse import FitFile
+from activity_cache import best_from_curve, load_activity
+from fit_decoder import power_values
 from vlamax_formula import predict_vlamax
+from mmp import combine_curves, MMP_DAUERN
+from result_cache import cache_table, get_result_cache
+from zones import histogram, time_in_zones
+startup_timing.mark("Imports")
 
 st.set_page_config(page_title="Leistungsprofil Analyse", layout="wide")
 
@@ -12,37 +17,37 @@ st.title("🚴 Leistungsprofil Analyse & Physiologie")
 
 uploaded_files = st.file_uploader("Wähle FIT-Dateien", type=["fit"], accept_multiple_files=True)
 
-def get_best_power(power_series, duration):
-    return max(
-        power_series[i:i+duration].mean()
-        for i in range(len(power_series) - duration + 1)
-    )
-
-power_data = []
+rides = []
+histogramme = {}
+ergebnisse = get_result_cache()
 
 if uploaded_files:
     for file in uploaded_files:
         if file is not None:
             try:
-                fitfile = FitFile(io.BytesIO(file.read()))
-                records = [r.get_values() for r in fitfile.get_messages("record")]
-                df = pd.DataFrame(records)
-                if "power" in df.columns:
-                    df = df[["power"]].dropna().reset_index(drop=True)
-
-                    for duration in [1, 5, 20, 30, 60, 120, 180, 300, 600, 900, 1200, 1800, 2400, 3600, 7200]:
-                        if len(df) >= duration:
-                            best = get_best_power(df["power"], duration)
-                            power_data.append((duration, round(best, 1)))
+                # Dekodieren + MMP-Kurve einmal pro Datei (SHA-256), prozessweit für alle Sitzungen gecacht;
+                # Änderungen an Gewicht/Fett/Geschlecht lösen nur noch die Formeln unten neu aus
+                activity = load_activity(file)
+                if len(activity["curve"]) > 0:
+                    rides.append(activity)
+                    histogramme[file.name] = ergebnisse.cached(
+                        "histogramm", activity["key"], lambda: histogram(power_values(activity["streams"])))
             except Exception as e:
                 st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
 
-if power_data:
-    df_power = pd.DataFrame(power_data, columns=["Dauer (s)", "Bestleistung (W)"])
-    df_power = df_power.drop_duplicates(subset=["Dauer (s)"])
+if rides:
+    keys = tuple(sorted(a["key"] for a in rides))
+    # Vollständige Leistungs-Dauer-Kurve (jede Sekunde) als Maximum über alle Dateien
+    curve = ergebnisse.cached("kurve", keys, lambda: combine_curves([a["curve"] for a in rides]))
+    best = best_from_curve(curve, MMP_DAUERN)
+    df_power = pd.DataFrame([(d, round(p, 1)) for d, p in best.items() if not np.isnan(p)], columns=["Dauer (s)", "Bestleistung (W)"])
     st.subheader("📈 Power-Daten aus FIT-Dateien")
     st.dataframe(df_power)
 
+    if len(curve) > 0:
+        df_curve = pd.DataFrame({"Dauer (s)": np.arange(1, len(curve) + 1), "Bestleistung (W)": curve})
+        st.line_chart(df_curve.set_index("Dauer (s)"))
+
     st.subheader("🧠 Eingabe für VO2max, VLamax & FTP")
     gewicht = st.number_input("Gewicht (kg)", 30.0, 120.0, 70.0, 0.1)
     fett = st.number_input("Körperfett (%)", 5.0, 50.0, 15.0, 0.1)
@@ -77,3 +82,17 @@ if power_data:
 
     for zone, (low, high) in zonen.items():
         st.write(f"{zone}: {low*ftp:.0f} – {high*ftp:.0f} W")
+
+    # Zeit in Zonen aus den 1-W-Histogrammen (ändert sich die FTP, wird nur umsortiert)
+    if histogramme:
+        zonen_w = {zone: (low * ftp, high * ftp) for zone, (low, high) in zonen.items()}
+        minuten = time_in_zones(np.stack(list(histogramme.values())), zonen_w) / 60
+        df_zeit = pd.DataFrame(minuten, index=list(histogramme), columns=list(zonen)).round(1)
+        df_zeit.loc["Gesamt"] = df_zeit.sum()
+        st.subheader("⏱️ Zeit in Zonen (min)")
+        st.dataframe(df_zeit)
+
+    with st.expander("🗄️ Cache"):
+        st.dataframe(pd.DataFrame(cache_table()))
+
+startup_timing.show(st, "app_bestwerte_robust")
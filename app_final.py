@@ -1,7 +1,7 @@
 
 import streamlit as st
 import io
-from fitparse import FitFile
+from startup_timing import lazy_import, show
 
 st.title("FIT-Dateien Analyse")
 
@@ -11,8 +11,11 @@ if uploaded_files:
     for file in uploaded_files:
         if file is not None:
             try:
-                fitfile = FitFile(io.BytesIO(file.read()))
+                # fitparse erst laden, wenn tatsächlich eine Datei kommt
+                fitfile = lazy_import("fitparse").FitFile(io.BytesIO(file.read()))
                 st.success(f"{file.name} erfolgreich geladen!")
                 # Hier könnte Analyse folgen
             except Exception as e:
                 st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
+
+show(st, "app_final")
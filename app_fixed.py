@@ -1,8 +1,21 @@
+import startup_timing
 import streamlit as st
 import pandas as pd
 import numpy as np
-from fitparse import FitFile
-from sklearn.linear_model import LinearRegression
+from activity import Activity
+from activity_cache import best_from_curve
+from parallel_ingest import ingest_files
+from athlete_store import get_store
+from activity_archive import ActivityArchive, DEFAULT_ARCHIVE_DIR
+from mmp import best_powers
+from resample import resample_1hz
+from wbal import wbal, wbal_history
+from zones import ride_histograms, time_in_zones
+from report_pdf import get_report, report_inputs
+from stage_profiler import StageProfiler
+from result_cache import get_result_cache
+from profile_metrics import athlete_type, durations, estimate_cp_params, estimate_vo2max_5min, estimate_vlamax, power_zones, heart_rate_zones
+startup_timing.mark("Imports")
 
 st.title("🚴 Erweiterte Leistungsanalyse aus FIT-Dateien")
 
@@ -11,252 +24,223 @@ uploaded_files = st.file_uploader("FIT-Dateien hochladen", type=["fit"], accept_
 gewicht = st.number_input("Körpergewicht (kg)", min_value=30.0, max_value=120.0, value=70.0, step=0.1)
 koerperfett = st.number_input("Körperfett (%)", min_value=5.0, max_value=50.0, value=15.0, step=0.1)
 geschlecht = st.selectbox("Geschlecht", ["Mann", "Frau"])
-
-# Feature Engineering
-ffm = gewicht * (1 - koerperfett / 100)
-geschlecht_code = 1 if geschlecht.lower() == "frau" else 0
-
-durations = [20, 30, 60, 180, 240, 300, 600, 720, 900, 1200, 1800]
-
-def extract_series(fitfile):
-    power_data = []
-    for record in fitfile.get_messages("record"):
-        power = record.get_value("power")
-        if power is not None:
-            power_data.append(power)
-    return power_data
-
-def best_avg(series, duration):
-    if len(series) >= duration:
-        rolling = np.convolve(series, np.ones(duration), 'valid') / duration
-        return max(rolling)
-    return np.nan
-
-def estimate_cp_model(power_dict):
-    durations_min = []
-    power_values = []
-    for d, p in power_dict.items():
-        if not np.isnan(p) and d >= 180:  # nur ab 3min sinnvoll für CP
-            durations_min.append(d / 60)
-            power_values.append(p)
-    if len(durations_min) < 2:
-        return np.nan  # nicht genug Daten
-    inv_t = 1 / np.array(durations_min)
-    P = np.array(power_values)
-    model = LinearRegression().fit(inv_t.reshape(-1,1), P)
-    cp = model.intercept_
-    return cp
-
-def estimate_vo2max_5min(power_300, weight):
-    # VO2max (absolut): VO2 [L/min] ≈ 0.01141 × P5min + 0.435
-    if np.isnan(power_300): return np.nan, np.nan
-    vo2_abs = 0.01141 * power_300 + 0.435
-    vo2_rel = vo2_abs * 1000 / weight
-    return vo2_abs, vo2_rel
-
-def estimate_vlamax(ffm, duration, avg, peak, geschlecht_code):
-    # Regression basierend auf deiner letzten Formel
-    return (
-        0.004385289349914 * ffm +
-        0.002030356114603 * duration +
-        0.000413636126981 * avg +
-        -0.000192203134232 * peak +
-        0.055897283917473 * geschlecht_code +
-        -0.141169048396927
-    )
-
-if uploaded_files:
-    all_best = []
-    peak_watts = []
-    for file in uploaded_files:
-        try:
-        fitfile = FitFile(io.BytesIO(file.read()))
-    except Exception as e:
-        st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
-        continue
-        power_series = extract_series(fitfile)
-        peak_watts.append(max(power_series) if len(power_series) > 0 else np.nan)
-        best = {dur: best_avg(power_series, dur) for dur in durations}
-        all_best.append(best)
-
-    if all_best:
-        df = pd.DataFrame(all_best)
-        combined = df.max(axis=0).to_dict()
-        peak = np.nanmax(peak_watts)
-        avg_20s = combined.get(20, np.nan)
-        duration = 20  # fest für VLamax-Schätzung
-
-        # FTP via CP-Modell
-        ftp = estimate_cp_model(combined)
-
-        # VO2max
-        vo2_abs, vo2_rel = estimate_vo2max_5min(combined.get(300, np.nan), gewicht)
-
-        # VLamax
-        vlamax = estimate_vlamax(ffm, duration, avg_20s, peak, geschlecht_code)
-
-        # Anzeige
-        st.subheader("📊 Bestwerte")
-        st.dataframe(pd.DataFrame(combined.items(), columns=["Dauer (s)", "Bestleistung (W)"]))
-
-        st.subheader("📈 Abgeleitete Parameter")
-        st.markdown(f"- **FTP (Critical Power)**: {ftp:.0f} W" if not np.isnan(ftp) else "- **FTP**: nicht berechenbar")
-        st.markdown(f"- **VO₂max absolut**: {vo2_abs:.2f} L/min")
-        st.markdown(f"- **VO₂max relativ**: {vo2_rel:.0f} ml/min/kg")
-        st.markdown(f"- **VLamax**: {vlamax:.2f} mmol/l/s")
-
-        st.subheader("📐 Trainingszonen basierend auf FTP")
-        if not np.isnan(ftp):
-            zones = {
-                "Zone 1 (Aktive Erholung)": (0, 0.55 * ftp),
-                "Zone 2 (Grundlagenausdauer)": (0.56 * ftp, 0.75 * ftp),
-                "Zone 3 (Tempo)": (0.76 * ftp, 0.9 * ftp),
-                "Zone 4 (Schwelle)": (0.91 * ftp, 1.05 * ftp),
-                "Zone 5 (VO₂max)": (1.06 * ftp, 1.20 * ftp),
-                "Zone 6 (Anaerob)": (1.21 * ftp, 1.50 * ftp),
-                "Zone 7 (Neuromuskulär)": (1.51 * ftp, np.nan)
-            }
-            df_zones = pd.DataFrame([
-                {"Zone": z, "Leistung (W)": f"{int(low)}–{int(high) if not np.isnan(high) else '∞'}"}
-                for z, (low, high) in zones.items()
-            ])
-            st.dataframe(df_zones)
-
-        st.subheader("❤️ Herzfrequenzbasierte Zonen (falls verfügbar)")
-        hr_all = []
-        hr_max = 0
-        for file in uploaded_files:
-            try:
-        fitfile = FitFile(io.BytesIO(file.read()))
-    except Exception as e:
-        st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
-        continue
-            for record in fitfile.get_messages("record"):
-                hr = record.get_value("heart_rate")
-                if hr:
+athlet = st.text_input("Athlet (optional, speichert Saisonbestwerte)")
+mit_archiv = bool(athlet) and st.checkbox("Archivierte Fahrten des Athleten einbeziehen")
+# Wand-/CPU-Zeit und RSS-Anstieg je Stufe und Datei; Log zusätzlich über POWERPROFILE_PROFILE_LOG
+prof = StageProfiler("app_fixed", enabled=st.sidebar.checkbox("🐞 Profiling anzeigen"))
+try:
+    # Feature Engineering
+    ffm = gewicht * (1 - koerperfett / 100)
+    geschlecht_code = 1 if geschlecht.lower() == "frau" else 0
+
+    if uploaded_files:
+        all_best = []
+        peak_watts = []
+        rides = []
+        # Dekodieren + MMP parallel über alle Kerne; bereits gecachte Dateien (SHA-256) werden übersprungen
+        fortschritt = st.progress(0.0)
+        ergebnisse = ingest_files(uploaded_files, progress=lambda done, total: fortschritt.progress(done / total), profiler=prof)
+        fortschritt.empty()
+        for name, activity, fehler in ergebnisse:
+            if activity is None:
+                st.error(f"Fehler beim Verarbeiten von {name}: {fehler}")
+                continue
+            with prof.stage("Bestwerte", name):
+                # Schmale Arrays (uint16/uint8/int32) statt DataFrame; Views ohne Kopie
+                ride = Activity.from_streams(activity["streams"], key=activity["key"], name=name)
+                rides.append(ride)
+                power_series = ride.power_valid()
+                peak_watts.append(power_series.max() if len(power_series) > 0 else np.nan)
+                best = best_from_curve(activity["curve"], durations)
+                all_best.append(best)
+            if athlet:
+                with prof.stage("Speichern (Athlet/Archiv)", name):
+                    get_store().merge_ride(athlet, activity)
+                    ActivityArchive(DEFAULT_ARCHIVE_DIR).append(ride, athlet)
+
+        if mit_archiv:
+            # Fahrten aus dem Archiv: gemappte Arrays statt erneutem Dekodieren der FIT-Dateien
+            archiv = ActivityArchive(DEFAULT_ARCHIVE_DIR)
+            neue_keys = {r.key for r in rides}
+            for i in archiv.select(athlete=athlet):
+                ride = archiv.get(i)
+                if ride.key in neue_keys:
+                    continue
+                with prof.stage("MMP (Archiv)", ride.name):
+                    rides.append(ride)
+                    power_series = ride.power_valid()
+                    peak_watts.append(power_series.max() if len(power_series) > 0 else np.nan)
+                    best = best_powers(power_series, durations)
+                    all_best.append({d: best.get(d, np.nan) for d in durations})
+
+        if all_best:
+            df = pd.DataFrame(all_best)
+            combined = df.max(axis=0).to_dict()
+            peak = np.nanmax(peak_watts)
+            avg_20s = combined.get(20, np.nan)
+            duration = 20  # fest für VLamax-Schätzung
+
+            # FTP via CP-Modell
+            with prof.stage("CP-Fit"):
+                cp_fit = estimate_cp_params(combined)
+            ftp = cp_fit["cp"]
+            ftp_wkg = ftp / gewicht
+
+            with prof.stage("VO2max/VLamax"):
+                vo2_abs, vo2_rel = estimate_vo2max_5min(combined.get(300, np.nan), gewicht)
+                vlamax = estimate_vlamax(ffm, duration, avg_20s, peak, geschlecht_code)
+
+            # Anzeige
+            st.subheader("📊 Bestwerte")
+            st.dataframe(pd.DataFrame(combined.items(), columns=["Dauer (s)", "Bestleistung (W)"]))
+
+            if athlet:
+                # Saisonbestwerte aus dem persistenten Athletenspeicher (ohne erneuten Upload der Historie)
+                st.subheader(f"🗓️ Saisonbestwerte {athlet}")
+                st.dataframe(pd.DataFrame(get_store().season_table(athlet, durations)).rename_axis("Dauer (s)"))
+                if not np.isnan(ftp):
+                    # Zonenzeiten über einen Zeitraum aus den gespeicherten Histogrammen
+                    tage = st.selectbox("Zeitraum Zonenzeiten", [7, 28, 42, 90, 365], index=1, format_func=lambda d: f"{d} Tage")
+                    summe = get_store().histograms(athlet, days=tage)
+                    if "power" in summe:
+                        zeiten = time_in_zones(summe["power"], power_zones(ftp)) / 3600
+                        st.dataframe(pd.DataFrame({"Zeit (h)": zeiten.round(2)}, index=list(power_zones(ftp))))
+
+            st.subheader("📈 Abgeleitete Parameter")
+            st.markdown(f"- **FTP (Critical Power)**: {ftp:.0f} W" if not np.isnan(ftp) else "- **FTP**: nicht berechenbar")
+            if not np.isnan(ftp):
+                st.markdown(f"- **W′ (anaerobe Kapazität)**: {cp_fit['w_prime'] / 1000:.1f} kJ (R² {cp_fit['r2']:.3f})")
+            st.markdown(f"- **VO₂max absolut**: {vo2_abs:.2f} L/min")
+            st.markdown(f"- **VO₂max relativ**: {vo2_rel:.0f} ml/min/kg")
+            st.markdown(f"- **VLamax**: {vlamax:.2f} mmol/l/s")
+
+            if not np.isnan(ftp) and cp_fit["w_prime"] > 0:
+                st.subheader("🔋 W′-Balance je Fahrt")
+                # 1-s-Raster je Fahrt, dann W′bal für alle Fahrten (O(n) pro Fahrt)
+                leistung_1hz = []
+                for r in rides:
+                    with prof.stage("Resampling", r.name):
+                        leistung_1hz.append(resample_1hz(r.t, {"power": r.power})[1]["power"])
+                with prof.stage("W′bal"):
+                    zusammenfassung = wbal_history(leistung_1hz, ftp, cp_fit["w_prime"])
+                st.dataframe(pd.DataFrame([
+                    {"Fahrt": r.name, "Min. W′bal (kJ)": round(z["min_wbal"] / 1000, 1), "Matches": z["n_matches"]}
+                    for r, z in zip(rides, zusammenfassung)
+                ]))
+                auswahl = st.selectbox("W′bal-Verlauf anzeigen", range(len(rides)), format_func=lambda i: rides[i].name)
+                st.line_chart(pd.DataFrame({"W′bal (kJ)": wbal(leistung_1hz[auswahl], ftp, cp_fit["w_prime"]) / 1000}))
+
+            st.subheader("📐 Trainingszonen basierend auf FTP")
+            if not np.isnan(ftp):
+                zones = power_zones(ftp)
+                df_zones = pd.DataFrame([
+                    {"Zone": z, "Leistung (W)": f"{int(low)}–{int(high) if not np.isnan(high) else '∞'}"}
+                    for z, (low, high) in zones.items()
+                ])
+                st.dataframe(df_zones)
+
+            # 1-W-/1-bpm-Histogramme je Fahrt, prozessweit nach SHA-256 gecacht: Zonenzeiten werden daraus
+            # nur umsortiert, Reruns und eine neue FTP/HFmax lesen die Rohdaten nicht erneut
+            ergebnisse = get_result_cache()
+            histogramme = []
+            for r in rides:
+                with prof.stage("Zonen-Histogramm", r.name):
+                    if r.key is None:
+                        histogramme.append(ride_histograms(r))
+                    else:
+                        histogramme.append(ergebnisse.cached("fahrt-histogramme", r.key, lambda r=r: ride_histograms(r)))
+            fahrten = [r.name for r in rides]
+
+            def zeit_in_zonen(kanal, zonen):
+                minuten = time_in_zones(np.stack([h[kanal] for h in histogramme]), zonen) / 60
+                df_zeit = pd.DataFrame(minuten, index=fahrten, columns=list(zonen)).round(1)
+                df_zeit.loc["Gesamt"] = df_zeit.sum()
+                return df_zeit
+
+            if not np.isnan(ftp) and rides:
+                st.markdown("**Zeit in Leistungszonen (min)**")
+                st.dataframe(zeit_in_zonen("power", zones))
+
+            st.subheader("❤️ Herzfrequenzbasierte Zonen (falls verfügbar)")
+            hr_all = []
+            hr_max = 0
+            # Herzfrequenz stammt aus demselben Dekodier-Durchlauf wie die Leistung
+            for ride in rides:
+                hr = ride.heart_rate_valid()
+                if len(hr) > 0:
                     hr_all.append(hr)
-                    if hr > hr_max:
-                        hr_max = hr
-
-        if hr_max > 0:
-            hr_zones = {
-                "Zone 1 (Regeneration)": (0, 0.6 * hr_max),
-                "Zone 2 (Grundlage)": (0.61 * hr_max, 0.7 * hr_max),
-                "Zone 3 (aerob)": (0.71 * hr_max, 0.8 * hr_max),
-                "Zone 4 (Schwelle)": (0.81 * hr_max, 0.89 * hr_max),
-                "Zone 5 (VO₂max)": (0.90 * hr_max, hr_max),
-            }
-            df_hr = pd.DataFrame([
-                {"Zone": z, "Pulsbereich (bpm)": f"{int(low)}–{int(high)}"}
-                for z, (low, high) in hr_zones.items()
-            ])
-            st.markdown(f"**Erkannte HFmax**: {hr_max} bpm")
-            st.dataframe(df_hr)
-        else:
-            st.write("⚠️ Keine Herzfrequenzdaten gefunden.")
-
-        from fpdf import FPDF
-        import base64
-
-        class PowerReportPDF(FPDF):
-            def header(self):
-                self.set_font("Arial", "B", 14)
-                self.cell(0, 10, "Leistungsanalyse", ln=True, align="C")
-                self.ln(5)
-
-            def section_title(self, title):
-                self.set_font("Arial", "B", 12)
-                self.set_fill_color(240, 240, 240)
-                self.cell(0, 10, title, ln=True, fill=True)
-                self.ln(1)
-
-            def print_parameter(self, label, value):
-                self.set_font("Arial", "", 11)
-                self.cell(0, 8, f"{label}: {value}", ln=True)
-
-        pdf = PowerReportPDF()
-        pdf.add_page()
-        pdf.section_title("Erkannte Leistungsdaten")
-        pdf.print_parameter("FTP", f"{ftp:.0f} W" if not np.isnan(ftp) else "nicht verfügbar")
-        pdf.print_parameter("VO2max (absolut)", f"{vo2_abs:.2f} L/min")
-        pdf.print_parameter("VO2max (relativ)", f"{vo2_rel:.0f} ml/min/kg")
-        pdf.print_parameter("VLamax", f"{vlamax:.2f} mmol/l/s")
-
-        if not np.isnan(ftp):
-            pdf.section_title("Trainingszonen (Leistung)")
-            for z, (low, high) in zones.items():
-                high_str = f"{int(high)}" if not np.isnan(high) else "∞"
-                pdf.print_parameter(z, f"{int(low)}-{high_str} W")
-
-        if hr_max > 0:
-            pdf.section_title("Herzfrequenz-Zonen")
-            pdf.print_parameter("HFmax", f"{hr_max} bpm")
-            for z, (low, high) in hr_zones.items():
-                pdf.print_parameter(z, f"{int(low)}-{int(high)} bpm")
-
-        pdf_path = "report.pdf"
-        pdf.output(pdf_path)
-
-        with open(pdf_path, "rb") as f:
-            b64 = base64.b64encode(f.read()).decode()
-
-        href = f'<a href="data:application/octet-stream;base64,{b64}" download="leistungsreport.pdf">📄 PDF herunterladen</a>'
-        st.markdown(href, unsafe_allow_html=True)
+                    hr_max = max(hr_max, int(hr.max()))
+
+            if hr_max > 0:
+                hr_zones = heart_rate_zones(hr_max)
+                df_hr = pd.DataFrame([
+                    {"Zone": z, "Pulsbereich (bpm)": f"{int(low)}–{int(high)}"}
+                    for z, (low, high) in hr_zones.items()
+                ])
+                st.markdown(f"**Erkannte HFmax**: {hr_max} bpm")
+                st.dataframe(df_hr)
+                st.markdown("**Zeit in HF-Zonen (min)**")
+                st.dataframe(zeit_in_zonen("heart_rate", hr_zones))
+            else:
+                st.write("⚠️ Keine Herzfrequenzdaten gefunden.")
 
-        st.subheader("🏁 Athletentyp & Renntyp-Vergleich")
+            # PDF im Speicher, gecacht nach Report-Eingaben: neu gerendert wird nur bei geänderten Werten
+            report = report_inputs(
+                ftp, vo2_abs, vo2_rel, vlamax,
+                zones=zones if not np.isnan(ftp) else None,
+                hr_max=hr_max, hr_zones=hr_zones if hr_max > 0 else None,
+            )
+            with prof.stage("PDF"):
+                pdf_bytes = get_report(report)
+            st.download_button("📄 PDF herunterladen", pdf_bytes, "leistungsreport.pdf", "application/pdf")
 
-        # Typzuordnung (basierend auf Werten)
-        typ = "Allrounder"
-        if vo2_rel >= 70 and vlamax <= 0.4 and ftp_wkg >= 4.8:
-            typ = "Bergfahrer"
-        elif vo2_rel >= 65 and vlamax <= 0.35:
-            typ = "Zeitfahrer"
-        elif vlamax >= 0.6 and ftp_wkg < 4.0:
-            typ = "Sprinter"
-        elif vo2_rel >= 65 and vlamax >= 0.5 and ftp_wkg >= 4.5:
-            typ = "MTB XCO"
-        elif vo2_rel >= 60 and vlamax <= 0.5 and ftp_wkg >= 4.2:
-            typ = "Marathon MTB"
-        elif vo2_rel >= 60 and vlamax >= 0.5:
-            typ = "Kriterium"
+            st.subheader("🏁 Athletentyp & Renntyp-Vergleich")
 
-        st.markdown(f"**Automatisch erkanntes Athletenprofil:** {typ}")
+            # Typzuordnung (basierend auf Werten)
+            typ = athlete_type(vo2_rel, vlamax, ftp_wkg)
 
-        # Zieltyp Auswahl
-        renntyp = st.selectbox("🔧 Ziel-Renntyp auswählen", [
-            "MTB XCO", "MTB Marathon", "Strassenrennen", "Zeitfahren", "Kriterium", "Sprintrennen"
-        ])
+            st.markdown(f"**Automatisch erkanntes Athletenprofil:** {typ}")
 
-        st.markdown(f"**Zieltyp laut Eingabe:** {renntyp}")
+            # Zieltyp Auswahl
+            renntyp = st.selectbox("🔧 Ziel-Renntyp auswählen", [
+                "MTB XCO", "MTB Marathon", "Strassenrennen", "Zeitfahren", "Kriterium", "Sprintrennen"
+            ])
 
-        # Vergleich und Empfehlungen
-        if typ != renntyp:
-            st.warning("⚠️ Profil stimmt nicht ganz mit dem Zieltyp überein.")
-            if renntyp == "MTB Marathon" and vlamax > 0.5:
-                st.info("➡️ VLamax senken durch extensive Schwellenintervalle (3x20', 4x15')")
-            elif renntyp == "MTB XCO" and vlamax < 0.5:
-                st.info("➡️ Glykolytische Leistung steigern mit 30/15s, VO₂max Intervallen")
-            elif renntyp == "Sprintrennen" and vlamax < 0.6:
-                st.info("➡️ Mehr Sprinttraining (z. B. 6x20s all-out mit voller Erholung)")
+            st.markdown(f"**Zieltyp laut Eingabe:** {renntyp}")
+
+            # Vergleich und Empfehlungen
+            if typ != renntyp:
+                st.warning("⚠️ Profil stimmt nicht ganz mit dem Zieltyp überein.")
+                if renntyp == "MTB Marathon" and vlamax > 0.5:
+                    st.info("➡️ VLamax senken durch extensive Schwellenintervalle (3x20', 4x15')")
+                elif renntyp == "MTB XCO" and vlamax < 0.5:
+                    st.info("➡️ Glykolytische Leistung steigern mit 30/15s, VO₂max Intervallen")
+                elif renntyp == "Sprintrennen" and vlamax < 0.6:
+                    st.info("➡️ Mehr Sprinttraining (z. B. 6x20s all-out mit voller Erholung)")
+                else:
+                    st.info("➡️ Trainingsfokus je nach Differenz individuell anpassen")
             else:
-                st.info("➡️ Trainingsfokus je nach Differenz individuell anpassen")
-        else:
-            st.success("✅ Athlet ist gut auf den Zieltyp abgestimmt.")
-
-        # Empfehlungen
-        st.subheader("📋 Trainingsvorschläge")
-        vorschlaege = {
-            "Sprinter": ["8x20s all-out", "6x30s uphill sprint", "3x5min low cadence"],
-            "Kriterium": ["4x3min VO₂max", "2x(5x1min/1min)", "Sprintwiederholungen"],
-            "MTB XCO": ["30/15s x 12min", "4x4min VO₂max", "5x1min uphill burst"],
-            "Marathon MTB": ["3x20min Schwelle", "2x12min sweetspot", "3x12min low cadence"],
-            "Zeitfahrer": ["4x10min @ FTP", "5x5min @ 90% MAP", "Over/Under 2x15min"],
-            "Bergfahrer": ["5x5min VO₂max", "3x8min Schwelle", "Laktatshuttle 4x3min"],
-            "Allrounder": ["3x10min Tempo", "4x5min Schwelle", "2x8min Over/Under"]
-        }
+                st.success("✅ Athlet ist gut auf den Zieltyp abgestimmt.")
+
+            # Empfehlungen
+            st.subheader("📋 Trainingsvorschläge")
+            vorschlaege = {
+                "Sprinter": ["8x20s all-out", "6x30s uphill sprint", "3x5min low cadence"],
+                "Kriterium": ["4x3min VO₂max", "2x(5x1min/1min)", "Sprintwiederholungen"],
+                "MTB XCO": ["30/15s x 12min", "4x4min VO₂max", "5x1min uphill burst"],
+                "Marathon MTB": ["3x20min Schwelle", "2x12min sweetspot", "3x12min low cadence"],
+                "Zeitfahrer": ["4x10min @ FTP", "5x5min @ 90% MAP", "Over/Under 2x15min"],
+                "Bergfahrer": ["5x5min VO₂max", "3x8min Schwelle", "Laktatshuttle 4x3min"],
+                "Allrounder": ["3x10min Tempo", "4x5min Schwelle", "2x8min Over/Under"]
+            }
 
-        for t, einheiten in vorschlaege.items():
-            if t == typ:
-                st.markdown(f"**Trainingsvorschläge für {t}:**")
-                for e in einheiten:
-                    st.markdown(f"- {e}")
+            for t, einheiten in vorschlaege.items():
+                if t == typ:
+                    st.markdown(f"**Trainingsvorschläge für {t}:**")
+                    for e in einheiten:
+                        st.markdown(f"- {e}")
+finally:
+    # Auch bei Fehlern/st.stop(): Messungen zeigen und ins Log schreiben
+    prof.show(st)
+    prof.finish()
+startup_timing.show(st, "app_fixed")
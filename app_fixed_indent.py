@@ -1,8 +1,11 @@
+import startup_timing
+import base64
+import io
 import streamlit as st
 import pandas as pd
 import numpy as np
-from fitparse import FitFile
-from sklearn.linear_model import LinearRegression
+from startup_timing import lazy_import
+startup_timing.mark("Imports")
 
 st.title("🚴 Erweiterte Leistungsanalyse aus FIT-Dateien")
 
@@ -43,6 +46,7 @@ def estimate_cp_model(power_dict):
         return np.nan  # nicht genug Daten
     inv_t = 1 / np.array(durations_min)
     P = np.array(power_values)
+    LinearRegression = lazy_import("sklearn.linear_model").LinearRegression
     model = LinearRegression().fit(inv_t.reshape(-1,1), P)
     cp = model.intercept_
     return cp
@@ -70,10 +74,11 @@ if uploaded_files:
     peak_watts = []
     for file in uploaded_files:
         try:
-        fitfile = FitFile(io.BytesIO(file.read()))
-    except Exception as e:
-        st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
-        continue
+            # fitparse erst beim ersten Upload laden
+            fitfile = lazy_import("fitparse").FitFile(io.BytesIO(file.read()))
+        except Exception as e:
+            st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
+            continue
         power_series = extract_series(fitfile)
         peak_watts.append(max(power_series) if len(power_series) > 0 else np.nan)
         best = {dur: best_avg(power_series, dur) for dur in durations}
@@ -127,10 +132,10 @@ if uploaded_files:
         hr_max = 0
         for file in uploaded_files:
             try:
-        fitfile = FitFile(io.BytesIO(file.read()))
-    except Exception as e:
-        st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
-        continue
+                fitfile = lazy_import("fitparse").FitFile(io.BytesIO(file.getvalue()))
+            except Exception as e:
+                st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
+                continue
             for record in fitfile.get_messages("record"):
                 hr = record.get_value("heart_rate")
                 if hr:
@@ -155,8 +160,8 @@ if uploaded_files:
         else:
             st.write("⚠️ Keine Herzfrequenzdaten gefunden.")
 
-        from fpdf import FPDF
-        import base64
+        # fpdf nur laden, wenn ein Report entsteht (einmal pro Prozess, mit Zeitmessung)
+        FPDF = lazy_import("fpdf").FPDF
 
         class PowerReportPDF(FPDF):
             def header(self):
@@ -260,3 +265,5 @@ if uploaded_files:
                 st.markdown(f"**Trainingsvorschläge für {t}:**")
                 for e in einheiten:
                     st.markdown(f"- {e}")
+
+startup_timing.show(st, "app_fixed_indent")
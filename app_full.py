@@ -1,11 +1,13 @@
 
+import startup_timing
 import streamlit as st
 import pandas as pd
 import numpy as np
-import io
-from fitparse import FitFile
+from fit_decoder import decode_fit, valid_mask
+from resample import DEFAULT_MAX_INTERPOLATE_S, resample_1hz
+from mmp import best_powers, MMP_DAUERN
 from vlamax_formula import predict_vlamax
-from sklearn.linear_model import LinearRegression
+startup_timing.mark("Imports")
 
 st.set_page_config(page_title="Leistungsprofil Analyse", layout="wide")
 
@@ -14,24 +16,23 @@ st.title("🚴 Leistungsprofil Analyse & Physiologie")
 uploaded_files = st.file_uploader("Wähle FIT-Dateien", type=["fit"], accept_multiple_files=True)
 
 power_data = []
+# Längere Lücken (Kaffeestopp, Ampel) zählen als Pause mit 0 W statt linear überbrückt zu werden
+max_luecke = st.number_input("Lücken bis (s) interpolieren, längere = Pause mit 0 W", 1, 3600, DEFAULT_MAX_INTERPOLATE_S)
 
 if uploaded_files:
     for file in uploaded_files:
         if file is not None:
             try:
-                fitfile = FitFile(io.BytesIO(file.read()))
-                records = [r.get_values() for r in fitfile.get_messages("record")]
-                df = pd.DataFrame(records)
-                if "power" in df.columns and "timestamp" in df.columns:
-                    df["timestamp"] = pd.to_datetime(df["timestamp"])
-                    df.set_index("timestamp", inplace=True)
-                    df = df.resample("1s").mean().interpolate()
-
-                    for dur in [1, 5, 20, 30, 60, 120, 180, 300, 600, 900, 1200, 1800, 2400, 3600, 7200]:
-                        window = df["power"].rolling(f"{dur}s").mean()
-                        if not window.empty:
-                            max_power = window.max()
-                            power_data.append((dur, max_power))
+                streams = decode_fit(file, ("timestamp", "power", "heart_rate"))
+                ok = valid_mask(streams, "timestamp")
+                if ok.any():
+                    # 1-s-Raster nur für Leistung/HF. Anders als das frühere resample().mean().interpolate()
+                    # werden Pausen nicht mehr überbrückt (sonst zu hohe Langzeit-Bestwerte); angefangene
+                    # Fenster zählen wie bei rolling(f"{dur}s") mit, also auch Dauern > Fahrtlänge
+                    _, grid = resample_1hz(streams["timestamp"][ok], {"power": streams["power"][ok], "heart_rate": streams["heart_rate"][ok]},
+                                           max_interpolate=max_luecke)
+                    for dur, max_power in best_powers(grid["power"], MMP_DAUERN, partial=True).items():
+                        power_data.append((dur, max_power))
             except Exception as e:
                 st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
 
@@ -75,3 +76,5 @@ if power_data:
 
     for zone, (low, high) in zonen.items():
         st.write(f"{zone}: {low*ftp:.0f} – {high*ftp:.0f} W")
+
+startup_timing.show(st, "app_full")
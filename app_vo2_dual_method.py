@@ -1,10 +1,13 @@
 
+import startup_timing
 import streamlit as st
 import pandas as pd
 import numpy as np
-import io
-from fitparse import FitFile
+from activity_cache import best_from_curve, load_activity
 from vlamax_formula import predict_vlamax
+from mmp import combine_curves, MMP_DAUERN
+from result_cache import cache_table, get_result_cache
+startup_timing.mark("Imports")
 
 st.set_page_config(page_title="Leistungsprofil Analyse", layout="wide")
 
@@ -12,34 +15,26 @@ st.title("🚴 Leistungsprofil Analyse & Physiologie")
 
 uploaded_files = st.file_uploader("Wähle FIT-Dateien", type=["fit"], accept_multiple_files=True)
 
-def get_best_power(power_series, duration):
-    return max(
-        power_series[i:i+duration].mean()
-        for i in range(len(power_series) - duration + 1)
-    )
-
-power_data = []
+rides = []
+ergebnisse = get_result_cache()
 
 if uploaded_files:
     for file in uploaded_files:
         if file is not None:
             try:
-                fitfile = FitFile(io.BytesIO(file.read()))
-                records = [r.get_values() for r in fitfile.get_messages("record")]
-                df = pd.DataFrame(records)
-                if "power" in df.columns:
-                    df = df[["power"]].dropna().reset_index(drop=True)
-
-                    for duration in [1, 5, 20, 30, 60, 120, 180, 300, 600, 900, 1200, 1800, 2400, 3600, 7200]:
-                        if len(df) >= duration:
-                            best = get_best_power(df["power"], duration)
-                            power_data.append((duration, round(best, 1)))
+                # Dekodieren + MMP-Kurve einmal pro Datei (SHA-256), prozessweit für alle Sitzungen gecacht;
+                # Änderungen an Gewicht/Fett/Methode lösen nur noch die Formeln unten neu aus
+                activity = load_activity(file)
+                if len(activity["curve"]) > 0:
+                    rides.append(activity)
             except Exception as e:
                 st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
 
-if power_data:
-    df_power = pd.DataFrame(power_data, columns=["Dauer (s)", "Bestleistung (W)"])
-    df_power = df_power.drop_duplicates(subset=["Dauer (s)"])
+if rides:
+    # Bestwerte über alle Dateien (elementweises Maximum der Kurven)
+    keys = tuple(sorted(a["key"] for a in rides))
+    best = ergebnisse.cached("best", keys, lambda: best_from_curve(combine_curves([a["curve"] for a in rides]), MMP_DAUERN))
+    df_power = pd.DataFrame([(d, round(p, 1)) for d, p in best.items() if not np.isnan(p)], columns=["Dauer (s)", "Bestleistung (W)"])
     st.subheader("📈 Power-Daten aus FIT-Dateien")
     st.dataframe(df_power)
 
@@ -87,3 +82,8 @@ if power_data:
 
     for zone, (low, high) in zonen.items():
         st.write(f"{zone}: {low*ftp:.0f} – {high*ftp:.0f} W")
+
+    with st.expander("🗄️ Cache"):
+        st.dataframe(pd.DataFrame(cache_table()))
+
+startup_timing.show(st, "app_vo2_dual_method")
@@ -2,9 +2,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import io
-from fitparse import FitFile
+from fit_decoder import decode_fit, power_values
 from vlamax_formula import predict_vlamax
+from mmp import best_powers, MMP_DAUERN
 
 st.set_page_config(page_title="Leistungsprofil Analyse", layout="wide")
 
@@ -12,28 +12,17 @@ st.title("🚴 Leistungsprofil Analyse & Physiologie")
 
 uploaded_files = st.file_uploader("Wähle FIT-Dateien", type=["fit"], accept_multiple_files=True)
 
-def get_best_power(power_series, duration):
-    return max(
-        power_series[i:i+duration].mean()
-        for i in range(len(power_series) - duration + 1)
-    )
-
 power_data = []
 
 if uploaded_files:
     for file in uploaded_files:
         if file is not None:
             try:
-                fitfile = FitFile(io.BytesIO(file.read()))
-                records = [r.get_values() for r in fitfile.get_messages("record")]
-                df = pd.DataFrame(records)
-                if "power" in df.columns:
-                    df = df[["power"]].dropna().reset_index(drop=True)
-
-                    for duration in [1, 5, 20, 30, 60, 120, 180, 300, 600, 900, 1200, 1800, 2400, 3600, 7200]:
-                        if len(df) >= duration:
-                            best = get_best_power(df["power"], duration)
-                            power_data.append((duration, round(best, 1)))
+                # Nur der Power-Kanal wird dekodiert, direkt als uint16-Array
+                power = power_values(decode_fit(file, ("power",)))
+                if len(power) > 0:
+                    for duration, best in best_powers(power, MMP_DAUERN).items():
+                        power_data.append((duration, round(best, 1)))
             except Exception as e:
                 st.error(f"Fehler beim Verarbeiten von {file.name}: {e}")
 
@@ -0,0 +1,212 @@
+import datetime as dt
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from activity import Activity
+from activity_archive import _FileLock
+from fit_decoder import FIT_EPOCH, valid_mask
+from zones import ride_histograms
+
+DEFAULT_STORE_DIR = os.environ.get("POWERPROFILE_STORE_DIR", os.path.join(os.path.expanduser("~"), ".local", "share", "powerprofile", "athletes"))
+
+# Standard-Zeitfenster (Tage) für Saisonbestwerte
+DEFAULT_WINDOWS = (42, 90, 365)
+
+
+def ride_date(streams):
+    # Datum der Fahrt aus dem ersten gültigen Zeitstempel (UTC); None ohne Zeitstempel
+    if "timestamp" not in streams:
+        return None
+    ts = streams["timestamp"][valid_mask(streams, "timestamp")]
+    if len(ts) == 0:
+        return None
+    return dt.datetime.fromtimestamp(int(ts[0]) + FIT_EPOCH, tz=dt.timezone.utc).date()
+
+
+def _merge_max(a, b):
+    # Elementweises Maximum zweier unterschiedlich langer Kurven
+    if a is None or len(a) == 0:
+        return np.asarray(b, dtype=np.float32)
+    n = max(len(a), len(b))
+    out = np.full(n, np.nan, dtype=np.float32)
+    out[:len(a)] = a
+    out[:len(b)] = np.fmax(out[:len(b)], b)
+    return out
+
+
+def _tmp_name(path, suffix):
+    # Eindeutig je Prozess/Thread, damit parallele Schreiber sich nicht die Temp-Datei überschreiben
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp{suffix}"
+
+
+class AthleteStore:
+    """Persistente Bestwerte-Kurven pro Athlet.
+
+    Pro Athlet ein Verzeichnis mit
+      - ``all_time.npy``: MMP-Kurve über alle Fahrten,
+      - ``days/YYYY-MM-DD.npy``: beste Kurve pro Tag,
+      - ``rides.json``: bereits übernommene Fahrten (SHA-256 -> Datum),
+      - ``hist/<sha256>.npz``: 1-W-/1-bpm-Histogramme je Fahrt (``zones.histogram``).
+
+    Eine neue Fahrt wird per elementweisem Maximum in Tages- und
+    Gesamtkurve eingerechnet, ohne die Historie neu zu verarbeiten.
+    Zeitfenster (42/90/365 Tage) lesen nur die betroffenen Tagesdateien,
+    per Memory-Mapping.
+
+    ``merge_ride`` ist prozessübergreifend gesperrt (``flock`` auf ``<athlet>/.lock``);
+    innerhalb eines Prozesses ``get_store()`` verwenden.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, athlete):
+        safe = re.sub(r"[^\w\-]+", "_", str(athlete).strip()) or "_"
+        return os.path.join(self.root, safe)
+
+    def _load_rides(self, athlete):
+        path = os.path.join(self._dir(athlete), "rides.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _save_npy(path, arr):
+        tmp = _tmp_name(path, ".npy")
+        np.save(tmp, arr)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _load_npy(path, mmap=False):
+        try:
+            return np.load(path, mmap_mode="r" if mmap else None)
+        except FileNotFoundError:
+            return None
+
+    def athletes(self):
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def merge_ride(self, athlete, activity, date=None):
+        """Übernimmt eine Fahrt (``activity_cache.load_activity``-Form) in die Bestwerte.
+
+        Gibt ``False`` zurück, wenn dieselbe Datei schon übernommen wurde.
+        """
+        key = activity["key"]
+        date = date or ride_date(activity["streams"]) or dt.date.today()
+        curve = np.asarray(activity["curve"], dtype=np.float32)
+        base = self._dir(athlete)
+        os.makedirs(os.path.join(base, "days"), exist_ok=True)
+        with self._lock, _FileLock(os.path.join(base, ".lock")):
+            rides = self._load_rides(athlete)
+            hist_path = os.path.join(base, "hist", f"{key}.npz")
+            if not os.path.exists(hist_path):
+                # auch für Fahrten nachholen, die vor den Histogrammen übernommen wurden
+                self._save_hist(hist_path, activity)
+            if key in rides:
+                return False
+
+            day_path = os.path.join(base, "days", f"{date.isoformat()}.npy")
+            self._save_npy(day_path, _merge_max(self._load_npy(day_path), curve))
+            all_path = os.path.join(base, "all_time.npy")
+            self._save_npy(all_path, _merge_max(self._load_npy(all_path), curve))
+
+            rides[key] = date.isoformat()
+            tmp = _tmp_name(os.path.join(base, "rides.json"), "")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(rides, f)
+            os.replace(tmp, os.path.join(base, "rides.json"))
+        return True
+
+    @staticmethod
+    def _save_hist(path, activity):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        hists = ride_histograms(Activity.from_streams(activity["streams"]))
+        tmp = _tmp_name(path, ".npz")
+        np.savez_compressed(tmp, **hists)
+        os.replace(tmp, path)
+
+    def histograms(self, athlete, days=None, today=None):
+        """Summierte Zeit-Histogramme (``{"power", "heart_rate"}``, Sekunden pro W/bpm).
+
+        Über alle Fahrten oder die der letzten ``days`` Tage; Zonenzeiten daraus
+        mit ``zones.time_in_zones`` für beliebige FTP/HFmax.
+        """
+        base = self._dir(athlete)
+        today = today or dt.date.today()
+        start = today - dt.timedelta(days=days - 1) if days is not None else None
+        total = {}
+        for key, day in self._load_rides(athlete).items():
+            if start is not None and not start <= dt.date.fromisoformat(day) <= today:
+                continue
+            try:
+                with np.load(os.path.join(base, "hist", f"{key}.npz")) as npz:
+                    for name in npz.files:
+                        h = npz[name].astype(np.uint64)
+                        total[name] = h if name not in total else total[name] + h
+            except FileNotFoundError:
+                continue
+        return total
+
+    def curve(self, athlete, days=None, today=None):
+        """MMP-Kurve des Athleten: gesamt (``days=None``) oder über die letzten ``days`` Tage."""
+        base = self._dir(athlete)
+        if days is None:
+            c = self._load_npy(os.path.join(base, "all_time.npy"))
+            return np.empty(0, dtype=np.float32) if c is None else c
+        result = None
+        for day_curve in self._day_curves(athlete, days, today):
+            result = _merge_max(result, day_curve)
+        return np.empty(0, dtype=np.float32) if result is None else result
+
+    def _day_curves(self, athlete, days, today=None):
+        today = today or dt.date.today()
+        start = today - dt.timedelta(days=days - 1)
+        day_dir = os.path.join(self._dir(athlete), "days")
+        if not os.path.isdir(day_dir):
+            return
+        for name in os.listdir(day_dir):
+            if not name.endswith(".npy") or name.endswith(".tmp.npy"):
+                continue
+            day = dt.date.fromisoformat(name[:-4])
+            if start <= day <= today:
+                yield self._load_npy(os.path.join(day_dir, name), mmap=True)
+
+    def best(self, athlete, duration, days=None, today=None):
+        """Bestleistung über ``duration`` Sekunden, z. B. 20-min-Bestwert der letzten 90 Tage.
+
+        Liest pro Tag nur einen Wert aus der gemappten Datei.
+        """
+        i = int(duration) - 1
+        if days is None:
+            c = self.curve(athlete)
+            return float(c[i]) if 0 <= i < len(c) else np.nan
+        values = [float(c[i]) for c in self._day_curves(athlete, days, today) if 0 <= i < len(c)]
+        return max(values) if values else np.nan
+
+    def season_table(self, athlete, durations, windows=DEFAULT_WINDOWS, today=None):
+        # {spalte: {dauer: bestwert}} für "Gesamt" und jedes Zeitfenster
+        curves = {"Gesamt": self.curve(athlete)}
+        for days in windows:
+            curves[f"{days} Tage"] = self.curve(athlete, days, today)
+        return {
+            label: {d: float(c[d - 1]) if 0 < d <= len(c) else np.nan for d in durations}
+            for label, c in curves.items()
+        }
+
+
+_default_store = None
+
+
+def get_store():
+    # Prozessweit, wie activity_cache.get_cache: eine Sperre für alle Sitzungen
+    global _default_store
+    if _default_store is None:
+        _default_store = AthleteStore()
+    return _default_store
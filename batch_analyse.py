@@ -0,0 +1,271 @@
+"""Batch-Auswertung ganzer FIT-Archive ohne Streamlit.
+
+Beispiel::
+
+    python batch_analyse.py /data/team/ "/data/extra/**/*.fit" -o profile.csv --gewicht 72 --workers 16
+    python batch_analyse.py --archiv /data/archiv/team --athlet Anna -o anna.parquet
+
+Jede Datei wird in einem Worker-Prozess dekodiert und ausgewertet; zurück
+kommt nur eine Ergebniszeile (Bestwerte, CP, VO₂max, VLamax, Zonen). Die
+Zeilen werden blockweise in CSV oder Parquet geschrieben, der Speicherbedarf
+bleibt damit unabhängig von der Archivgröße.
+"""
+import argparse
+import csv
+import glob
+import os
+import re
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from activity_archive import ActivityArchive
+from activity_cache import best_from_curve, load_activity
+from athlete_store import ride_date
+from fit_decoder import DEFAULT_CHANNELS, decode_fit, heart_rate_values, power_values
+from mmp import MMP_DAUERN, best_powers
+from profile_metrics import estimate_cp_model, estimate_vlamax, estimate_vo2max_5min, heart_rate_zones, power_zones
+from report_pdf import render_report, report_inputs
+
+
+def iter_fit_files(inputs):
+    # Verzeichnisse rekursiv, sonst Glob-Muster oder einzelne Dateien
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in sorted(files):
+                    if name.lower().endswith(".fit"):
+                        yield os.path.join(root, name)
+        else:
+            yield from sorted(glob.iglob(item, recursive=True))
+
+
+def analyse_file(path, gewicht, koerperfett, geschlecht_code, use_cache=False):
+    """Wertet eine FIT-Datei aus und liefert eine flache Ergebniszeile (Dict).
+
+    Ohne ``use_cache`` werden nur die ``MMP_DAUERN`` per ``best_powers`` (O(n)
+    je Dauer) bestimmt statt der vollständigen MMP-Kurve (O(n²)); mit Cache
+    wird die Kurve ohnehin abgelegt und wiederverwendet.
+    """
+    row = {"datei": path}
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        if use_cache:
+            activity = load_activity(data)
+            streams = activity["streams"]
+            power = power_values(streams)
+            best = best_from_curve(activity["curve"], MMP_DAUERN)
+        else:
+            streams = decode_fit(data, DEFAULT_CHANNELS)
+            power = power_values(streams)
+            best = best_powers(power, MMP_DAUERN)
+        return _profile_row(row, power, best, heart_rate_values(streams), ride_date(streams),
+                            gewicht, koerperfett, geschlecht_code)
+    except Exception as e:
+        row["fehler"] = str(e)
+        return row
+
+
+_archive = None
+
+
+def analyse_archive_entry(path, i, gewicht, koerperfett, geschlecht_code):
+    """Wertet Fahrt ``i`` eines ``ActivityArchive`` aus – ohne FIT-Dekodierung."""
+    global _archive
+    if _archive is None or _archive.path != path:
+        _archive = ActivityArchive(path)  # ein Mapping pro Worker-Prozess
+    ride = _archive.get(i)
+    row = {"datei": f"{path}#{i}:{ride.name}"}
+    power = ride.power_valid()
+    return _profile_row(row, power, best_powers(power, MMP_DAUERN), ride.heart_rate_valid(), ride.date,
+                        gewicht, koerperfett, geschlecht_code)
+
+
+def _profile_row(row, power, best, hr, datum, gewicht, koerperfett, geschlecht_code):
+    # ``best``: {dauer: watt}; fehlende Dauern (Fahrt zu kurz) werden NaN
+    row["datum"] = datum.isoformat() if datum else ""
+    row["samples"] = len(power)
+    row["peak_w"] = float(power.max()) if len(power) else np.nan
+    best = {d: best.get(d, np.nan) for d in MMP_DAUERN}
+    for d, p in best.items():
+        row[f"mmp_{d}s"] = p
+
+    cp = estimate_cp_model({d: p for d, p in best.items() if d >= 180})
+    vo2_abs, vo2_rel = estimate_vo2max_5min(best[300], gewicht)
+    ffm = gewicht * (1 - koerperfett / 100)
+    row["cp_w"] = cp
+    row["vo2max_l_min"] = vo2_abs
+    row["vo2max_ml_min_kg"] = vo2_rel
+    row["vlamax"] = estimate_vlamax(ffm, 20, best[20], row["peak_w"], geschlecht_code)
+
+    for i, (_, (_, high)) in enumerate(power_zones(cp).items(), start=1):
+        row[f"zone{i}_bis_w"] = high
+    hr_max = int(hr.max()) if len(hr) else 0
+    row["hf_max"] = hr_max or np.nan
+    for i, (_, (_, high)) in enumerate(heart_rate_zones(hr_max or np.nan).items(), start=1):
+        row[f"hf_zone{i}_bis"] = high
+    row["fehler"] = ""
+    return row
+
+
+def _columns():
+    # Feste Spaltenreihenfolge, damit auch Fehlerzeilen in dieselbe Tabelle passen
+    cols = ["datei", "datum", "samples", "peak_w"] + [f"mmp_{d}s" for d in MMP_DAUERN]
+    cols += ["cp_w", "vo2max_l_min", "vo2max_ml_min_kg", "vlamax"]
+    cols += [f"zone{i}_bis_w" for i in range(1, 8)] + ["hf_max"] + [f"hf_zone{i}_bis" for i in range(1, 6)]
+    return cols + ["fehler"]
+
+
+class _CsvWriter:
+    def __init__(self, path, columns):
+        self.f = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.f, fieldnames=columns, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet-Ausgabe benötigt 'pyarrow' (pip install pyarrow)")
+        self.pa = pa
+        self.columns = columns
+        text = {"datei", "datum", "fehler"}
+        self.schema = pa.schema([(c, pa.string() if c in text else pa.float64()) for c in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        data = {}
+        for c in self.columns:
+            values = [r.get(c) for r in rows]
+            if self.schema.field(c).type == self.pa.float64():
+                data[c] = [None if v is None else float(v) for v in values]
+            else:
+                data[c] = ["" if v is None else str(v) for v in values]
+        self.writer.write_table(self.pa.table(data, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def _write_report(row, outdir, name=None):
+    # PDF einer Fahrt, direkt im Worker gerendert und geschrieben (nur Bytes auf Platte, nichts zurück)
+    if name is None:
+        # Archiv-Eintrag "pfad#i:name" -> "i_name"
+        name = re.sub(r"[^\w\-.]+", "_", row["datei"].split("#")[-1])
+    hr_max = 0 if np.isnan(row["hf_max"]) else int(row["hf_max"])
+    pdf = render_report(report_inputs(
+        row["cp_w"], row["vo2max_l_min"], row["vo2max_ml_min_kg"], row["vlamax"],
+        zones=power_zones(row["cp_w"]) if np.isfinite(row["cp_w"]) else None,
+        hr_max=hr_max, hr_zones=heart_rate_zones(hr_max) if hr_max else None,
+        title=f"Leistungsanalyse {os.path.basename(row['datei'])}",
+    ))
+    path = os.path.join(outdir, f"{name}.pdf")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(pdf)
+    os.replace(tmp, path)
+
+
+def _pdf_names(paths):
+    # Relativer Pfad unterhalb des gemeinsamen Verzeichnisses als Dateiname: a/ride.fit -> a__ride
+    root = os.path.commonpath([os.path.abspath(p) for p in paths])
+    if len(paths) == 1:
+        root = os.path.dirname(root)
+    return [os.path.splitext(os.path.relpath(os.path.abspath(p), root))[0].replace(os.sep, "__") for p in paths]
+
+
+def _worker(job):
+    # Jeder Fehler bleibt in seiner Zeile; eine defekte Datei bricht nie den ganzen Lauf ab
+    kind, params, pdf = job
+    try:
+        row = analyse_archive_entry(*params) if kind == "archiv" else analyse_file(*params)
+    except Exception as e:
+        name = f"{params[0]}#{params[1]}" if kind == "archiv" else params[0]
+        row = {"datei": name, "fehler": str(e)}
+    if pdf is not None and not row["fehler"]:
+        try:
+            _write_report(row, *pdf)
+        except Exception as e:
+            row["fehler"] = f"PDF: {e}"
+    return row
+
+
+def _progress(done, total, fehler, start):
+    rate = done / max(time.perf_counter() - start, 1e-9)
+    sys.stderr.write(f"\r{done}/{total} Dateien ({rate:.1f}/s, {fehler} Fehler)")
+    sys.stderr.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FIT-Dateien im Batch auswerten (MMP, CP, VO₂max, VLamax, Zonen)")
+    parser.add_argument("inputs", nargs="*", help="Verzeichnisse, Dateien oder Glob-Muster (z. B. 'archiv/**/*.fit')")
+    parser.add_argument("-o", "--output", required=True, help="Ausgabedatei (.csv oder .parquet)")
+    parser.add_argument("--gewicht", type=float, default=70.0, help="Körpergewicht (kg)")
+    parser.add_argument("--koerperfett", type=float, default=15.0, help="Körperfett (%%)")
+    parser.add_argument("--geschlecht", choices=["Mann", "Frau"], default="Mann")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Anzahl Worker-Prozesse")
+    parser.add_argument("--block", type=int, default=500, help="Zeilen pro Schreibblock")
+    parser.add_argument("--cache", action="store_true", help="Dekodierte Fahrten im Aktivitäts-Cache ablegen/wiederverwenden")
+    parser.add_argument("--archiv", help="Fahrten aus einem ActivityArchive statt aus FIT-Dateien lesen")
+    parser.add_argument("--athlet", help="Mit --archiv: nur Fahrten dieses Athleten")
+    parser.add_argument("--pdf", help="Zusätzlich einen PDF-Report pro Fahrt in dieses Verzeichnis schreiben")
+    args = parser.parse_args(argv)
+
+    geschlecht_code = 1 if args.geschlecht == "Frau" else 0
+    if args.archiv:
+        paths = ActivityArchive(args.archiv).select(athlete=args.athlet).tolist()
+        if not paths:
+            parser.error("Keine Fahrten gefunden")
+        # PDFs werden in denselben Worker-Prozessen gerendert wie die Auswertung
+        jobs = (("archiv", (args.archiv, i, args.gewicht, args.koerperfett, geschlecht_code),
+                 (args.pdf, None) if args.pdf else None) for i in paths)
+    else:
+        paths = list(iter_fit_files(args.inputs))
+        if not paths:
+            parser.error("Keine Fahrten gefunden")
+        names = _pdf_names(paths) if args.pdf else [None] * len(paths)
+        jobs = (("fit", (p, args.gewicht, args.koerperfett, geschlecht_code, args.cache),
+                 (args.pdf, name) if args.pdf else None) for p, name in zip(paths, names))
+
+    if args.pdf:
+        os.makedirs(args.pdf, exist_ok=True)
+    columns = _columns()
+    writer = _ParquetWriter(args.output, columns) if args.output.endswith(".parquet") else _CsvWriter(args.output, columns)
+    start = time.perf_counter()
+    done = fehler = 0
+    block = []
+    try:
+        with Pool(processes=max(1, args.workers)) as pool:
+            # imap_unordered mit chunksize: Ergebnisse werden gestreamt, nicht gesammelt
+            for row in pool.imap_unordered(_worker, jobs, chunksize=8):
+                block.append(row)
+                done += 1
+                fehler += bool(row["fehler"])
+                if len(block) >= args.block:
+                    writer.write(block)
+                    block = []
+                if done % 25 == 0 or done == len(paths):
+                    _progress(done, len(paths), fehler, start)
+        if block:
+            writer.write(block)
+    finally:
+        writer.close()
+    sys.stderr.write(f"\nFertig: {done} Dateien in {time.perf_counter() - start:.1f} s -> {args.output}\n")
+    return 0 if fehler < done else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Vektorisierte Schätzung von VLamax und VO₂max für viele Athleten auf einmal.
+
+Eingabe ist ein DataFrame, ein strukturiertes NumPy-Array oder ein Dict von
+Spalten; jede Funktion rechnet alle N Zeilen in einem Aufruf (Formeln als
+Array-Ausdruck, Modelle mit einem einzigen ``predict``)::
+
+    df = pd.read_csv("athleten.csv")          # 2000 Zeilen
+    df["VLamax"] = vlamax_formula_batch(df)
+    df["VO2max_ML"] = vo2max_model_batch(df)
+"""
+import numpy as np
+import pandas as pd
+
+from model_registry import get_registry
+from profile_metrics import estimate_vlamax, estimate_vo2max_5min
+from vlamax_formula import berechne_vlamax
+from vo2_training import FEATURES as VO2_FEATURES
+
+# Spalten in der Reihenfolge der Funktions- bzw. Modellargumente
+VLAMAX_COLUMNS = ["ffm", "dauer", "watt_avg", "watt_peak", "geschlecht_code"]
+
+VLAMAX_FORMULAS = {
+    "profile_metrics": estimate_vlamax,
+    "vlamax_formula": berechne_vlamax,
+}
+
+
+def _column(data, name):
+    # Funktioniert für DataFrame-Spalten, Felder strukturierter Arrays und Dict-Einträge
+    return np.asarray(data[name], dtype=np.float64)
+
+
+def feature_matrix(data, columns):
+    """``(N, len(columns))``-float64-Matrix aus DataFrame, strukturiertem Array oder Dict."""
+    if isinstance(data, np.ndarray) and not data.dtype.names:
+        return np.asarray(data, dtype=np.float64).reshape(-1, len(columns))
+    missing = [c for c in columns if c not in _names(data)]
+    if missing:
+        raise KeyError(f"Fehlende Spalten: {', '.join(missing)}")
+    return np.column_stack([_column(data, c) for c in columns])
+
+
+def _names(data):
+    if isinstance(data, np.ndarray):
+        return data.dtype.names
+    return list(data.keys()) if isinstance(data, dict) else list(data.columns)
+
+
+def vlamax_formula_batch(data, formula="profile_metrics"):
+    # Regressionsformel über alle Zeilen; die Formeln sind reine Array-Ausdrücke
+    X = feature_matrix(data, VLAMAX_COLUMNS)
+    return np.asarray(VLAMAX_FORMULAS[formula](*X.T), dtype=np.float64)
+
+
+def vlamax_model_batch(data, registry=None):
+    # joblib-VLamax-Modell, ein predict für alle Zeilen
+    return (registry or get_registry()).predict("vlamax", feature_matrix(data, VLAMAX_COLUMNS))
+
+
+def vo2max_formula_batch(power_300, weight):
+    # (absolut L/min, relativ ml/min/kg) aus der 5-min-Leistung, elementweise
+    return estimate_vo2max_5min(np.asarray(power_300, dtype=np.float64), np.asarray(weight, dtype=np.float64))
+
+
+def vo2max_model_batch(data, registry=None):
+    """VO₂max (ml/min/kg) aus dem trainierten Modell; ``FFM`` wird bei Bedarf aus Gewicht/Körperfett ergänzt."""
+    if "FFM" not in _names(data) and not (isinstance(data, np.ndarray) and not data.dtype.names):
+        # Nur die benötigten Spalten umwandeln; Name/Datum o. Ä. bleiben unberührt
+        data = {c: _column(data, c) for c in ["Gewicht", "Körperfett"] + [f for f in VO2_FEATURES if f != "FFM"]}
+        data["FFM"] = data["Gewicht"] * (1 - data["Körperfett"] / 100)
+    X = pd.DataFrame(feature_matrix(data, VO2_FEATURES), columns=VO2_FEATURES)
+    return (registry or get_registry()).predict("vo2max", X)
@@ -0,0 +1,206 @@
+"""Benchmarks der Hot Paths mit synthetischen Fahrten.
+
+    python benchmark.py --hours 1 6 24 --smart-recording --json bench.json
+
+Gemessen werden Laufzeit und Peak-Speicher (tracemalloc) je Stufe. Die
+bisherigen Implementierungen aus den Apps (``get_best_power``, ``best_avg``
+mit ``np.convolve``, ``resample("1s").mean().interpolate()`` + ``rolling``,
+``estimate_cp_model`` mit scikit-learn) laufen als Referenz mit; die optimierten Varianten
+müssen dieselben Zahlen liefern, sonst bricht der Lauf mit Exit-Code 1 ab.
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from fit_decoder import FIT_EPOCH, decode_fit, power_values
+from mmp import MMP_DAUERN, best_powers, mmp_curve
+from profile_metrics import estimate_cp_model
+from resample import resample_1hz
+from synthetic_rides import synthetic_streams, write_fit
+
+# Referenz-Stützstellen wie in app_fixed.py
+CP_DAUERN = [20, 30, 60, 180, 240, 300, 600, 720, 900, 1200, 1800]
+
+
+# --- Referenzimplementierungen (unverändert aus den Apps übernommen) ---
+
+def ref_get_best_power(power_series, duration):
+    return max(
+        power_series[i:i+duration].mean()
+        for i in range(len(power_series) - duration + 1)
+    )
+
+
+def ref_best_avg(series, duration):
+    if len(series) >= duration:
+        rolling = np.convolve(series, np.ones(duration), 'valid') / duration
+        return max(rolling)
+    return np.nan
+
+
+def ref_resample_rolling(streams):
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(streams["timestamp"], unit="s"),
+        "power": streams["power"].astype(float),
+        "heart_rate": streams["heart_rate"].astype(float),
+        "cadence": streams["cadence"].astype(float),
+    })
+    df.set_index("timestamp", inplace=True)
+    df = df.resample("1s").mean().interpolate()
+    return {dur: df["power"].rolling(f"{dur}s").mean().max() for dur in MMP_DAUERN}
+
+
+def ref_estimate_cp_model(power_dict):
+    from sklearn.linear_model import LinearRegression
+
+    durations_min = []
+    power_values = []
+    for d, p in power_dict.items():
+        if not np.isnan(p) and d >= 180:
+            durations_min.append(d / 60)
+            power_values.append(p)
+    if len(durations_min) < 2:
+        return np.nan
+    inv_t = 1 / np.array(durations_min)
+    model = LinearRegression().fit(inv_t.reshape(-1,1), np.array(power_values))
+    return model.intercept_
+
+
+# --- Messung ---
+
+def measure(fn, *args, repeat=1):
+    """Führt ``fn`` aus; liefert (Ergebnis, beste Laufzeit s, Peak-Speicher MB).
+
+    Die Zeit wird ohne tracemalloc gemessen (bestes von ``repeat`` Läufen),
+    der Speicher in einem zusätzlichen Lauf mit tracemalloc.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, best, peak / 1e6
+
+
+def _close(a, b, tol=1e-6):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    return a.shape == b.shape and np.allclose(a, b, rtol=tol, atol=tol, equal_nan=True)
+
+
+def run_ride(hours, smart_recording=False, pauses=0, reference_limit_h=1.0, fitparse=False, repeat=3, seed=0):
+    streams = synthetic_streams(hours, seed=seed, smart_recording=smart_recording, pauses=pauses)
+    data = write_fit(streams)
+    power = streams["power"]
+    power_f = pd.Series(power.astype(float))
+    rows = []
+    mismatches = []
+
+    def add(stage, impl, seconds, peak_mb, note=""):
+        rows.append({"stunden": hours, "samples": len(power), "stufe": stage, "variante": impl,
+                     "sekunden": seconds, "peak_mb": peak_mb, "hinweis": note})
+
+    # Dekodieren
+    decoded, s, m = measure(decode_fit, data, repeat=repeat)
+    add("decode", "decode_fit", s, m)
+    if not (decoded["power"] == power).all() or not (decoded["timestamp"].astype(np.int64) + FIT_EPOCH == streams["timestamp"]).all():
+        mismatches.append(f"decode {hours} h")
+    if fitparse:
+        import io
+        from fitparse import FitFile
+        _, s, m = measure(lambda d: [r.get_values() for r in FitFile(io.BytesIO(d)).get_messages("record")], data)
+        add("decode", "fitparse (Referenz)", s, m)
+
+    # MMP für die Standard-Dauern
+    fast, s, m = measure(best_powers, power_values(decoded), MMP_DAUERN, repeat=repeat)
+    add("mmp", "best_powers", s, m)
+    if hours <= reference_limit_h:
+        ref, s, m = measure(lambda p: {d: ref_get_best_power(p, d) for d in MMP_DAUERN if len(p) >= d}, power_f)
+        add("mmp", "get_best_power (Referenz)", s, m)
+        if not _close(list(ref.values()), [fast[d] for d in ref]):
+            mismatches.append(f"mmp/get_best_power {hours} h")
+    else:
+        add("mmp", "get_best_power (Referenz)", np.nan, np.nan, f"übersprungen (> {reference_limit_h} h)")
+
+    ref, s, m = measure(lambda p: {d: ref_best_avg(p, d) for d in CP_DAUERN}, power, repeat=repeat)
+    add("mmp", "best_avg/np.convolve (Referenz)", s, m)
+    fast_cp = best_powers(power, CP_DAUERN)
+    if not _close([ref[d] for d in CP_DAUERN], [fast_cp.get(d, np.nan) for d in CP_DAUERN]):
+        mismatches.append(f"mmp/best_avg {hours} h")
+
+    curve, s, m = measure(mmp_curve, power, repeat=repeat)
+    add("mmp_kurve", "mmp_curve (alle Dauern)", s, m)
+    if not _close([curve[d - 1] for d in fast], list(fast.values())):
+        mismatches.append(f"mmp_curve {hours} h")
+
+    # Resampling + rolling (app_full.py)
+    ref, s, m = measure(ref_resample_rolling, streams)
+    add("resample", "pandas resample+rolling (Referenz)", s, m)
+    # Parität mit pandas, wenn über alle Lücken interpoliert wird (max_interpolate=inf). app_full
+    # füllt Lücken > DEFAULT_MAX_INTERPOLATE_S dagegen mit 0 W; nur bei Fahrten ohne Pausen sind die Werte gleich
+    app = best_powers(resample_1hz(streams["timestamp"], {"power": streams["power"]}, max_interpolate=np.inf)[1]["power"],
+                      MMP_DAUERN, partial=True)
+    if not _close([ref[d] for d in MMP_DAUERN], [app.get(d, np.nan) for d in MMP_DAUERN]):
+        mismatches.append(f"resample/rolling {hours} h")
+    _, s, m = measure(lambda st_: best_powers(resample_1hz(st_["timestamp"], {"power": st_["power"], "heart_rate": st_["heart_rate"]})[1]["power"]), streams, repeat=repeat)
+    add("resample", "resample_1hz + best_powers", s, m)
+
+    # CP-Modell
+    combined = {d: float(curve[d - 1]) if d <= len(curve) else np.nan for d in CP_DAUERN}
+    cp, s, m = measure(estimate_cp_model, combined, repeat=repeat)
+    add("cp", "estimate_cp_model (NumPy)", s, m)
+    try:
+        ref, s, m = measure(ref_estimate_cp_model, combined, repeat=repeat)
+        add("cp", "LinearRegression (Referenz)", s, m)
+        if not _close([cp], [ref]):
+            mismatches.append(f"cp {hours} h")
+    except ImportError:
+        add("cp", "LinearRegression (Referenz)", np.nan, np.nan, "scikit-learn nicht installiert")
+
+    return rows, mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark der Leistungsanalyse-Hot-Paths")
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 6, 24], help="Fahrtlängen (h)")
+    parser.add_argument("--smart-recording", action="store_true", help="1–5 s Sample-Abstände wie Smart Recording")
+    parser.add_argument("--pauses", type=int, default=0, help="Anzahl Pausen pro Fahrt")
+    parser.add_argument("--reference-limit", type=float, default=1.0, help="get_best_power nur bis zu dieser Länge (h) messen")
+    parser.add_argument("--fitparse", action="store_true", help="fitparse-Referenz mitmessen (langsam)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON-Datei schreiben")
+    args = parser.parse_args(argv)
+
+    rows, mismatches = [], []
+    for hours in args.hours:
+        r, mm = run_ride(hours, args.smart_recording, args.pauses, args.reference_limit, args.fitparse, args.repeat, args.seed)
+        rows += r
+        mismatches += mm
+
+    df = pd.DataFrame(rows)
+    with pd.option_context("display.max_rows", None, "display.width", 160):
+        print(df.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "mismatches": mismatches}, f, indent=2, default=float)
+    if mismatches:
+        print("❌ Abweichungen gegenüber Referenz:", ", ".join(mismatches), file=sys.stderr)
+        return 1
+    print("✅ Optimierte Varianten stimmen mit der Referenz überein")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
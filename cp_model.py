@@ -0,0 +1,135 @@
+import numpy as np
+
+# Grobraster für die Zeitkonstante k = W' / (Pmax - CP) des 3-Parameter-Modells (s);
+# danach wird pro Zeile lokal um das beste k verfeinert
+DEFAULT_K_GRID = np.geomspace(1.0, 300.0, 16)
+DEFAULT_K_REFINE = 16
+
+
+def _prepare(durations, powers, min_duration, max_duration=None):
+    # Bringt Dauern/Leistungen auf gemeinsame Form (..., k) und maskiert ungültige Punkte
+    t = np.asarray(durations, dtype=np.float64)
+    p = np.asarray(powers, dtype=np.float64)
+    t = np.broadcast_to(t, p.shape)
+    mask = np.isfinite(p) & np.isfinite(t) & (t >= min_duration) & (p > 0)
+    if max_duration is not None:
+        mask &= t <= max_duration
+    return t, np.where(mask, p, 0.0), mask
+
+
+def _linear_fit(x, y, mask):
+    # Geschlossene Kleinste-Quadrate-Lösung y = a + b·x je Zeile, nur über maskierte Punkte.
+    # x und y sind außerhalb der Maske bereits 0 (siehe _prepare), die Summen brauchen keine Maske.
+    m = mask.astype(np.float64)
+    n = m.sum(-1)
+    sx = x.sum(-1)
+    sy = y.sum(-1)
+    sxx = (x * x).sum(-1)
+    sxy = (x * y).sum(-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        det = n * sxx - sx * sx
+        b = (n * sxy - sx * sy) / det
+        a = (sy - b * sx) / n
+        resid = np.where(mask, y - (a[..., None] + b[..., None] * x), 0.0)
+        sse = (resid ** 2).sum(-1)
+        mean = sy / n
+        sst = (m * (y - mean[..., None]) ** 2).sum(-1)
+    ok = (n >= 2) & (det > 0)
+    return np.where(ok, a, np.nan), np.where(ok, b, np.nan), sse, sst, n
+
+
+def _goodness(sse, sst, n, n_params):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r2 = np.where(sst > 0, 1 - sse / sst, np.nan)
+        rmse = np.sqrt(sse / n)
+        see = np.sqrt(sse / np.maximum(n - n_params, 1))
+    return r2, rmse, see
+
+
+def fit_cp2(durations, powers, min_duration=180, max_duration=None):
+    """2-Parameter-CP-Modell ``P(t) = CP + W'/t`` per geschlossener Kleinste-Quadrate-Lösung.
+
+    ``durations``: Dauern in s, Form ``(k,)`` oder wie ``powers``.
+    ``powers``: Bestleistungen in W, Form ``(..., k)`` – also z. B.
+    ``(athleten, fenster, k)`` für viele Athleten × Zeitfenster auf einmal.
+    NaN-Werte und Dauern unter ``min_duration`` werden ignoriert.
+
+    Rückgabe: Dict mit Arrays der Form ``(...)``: ``cp`` (W), ``w_prime`` (J),
+    ``r2``, ``rmse`` (W), ``see`` (Standardfehler, W), ``n`` (Punkte);
+    NaN, wo weniger als zwei Punkte vorliegen.
+    """
+    t, p, mask = _prepare(durations, powers, min_duration, max_duration)
+    with np.errstate(divide="ignore"):
+        x = np.where(mask, 1.0 / t, 0.0)
+    cp, w_prime, sse, sst, n = _linear_fit(x, p, mask)
+    r2, rmse, see = _goodness(sse, sst, n, 2)
+    valid = np.isfinite(cp)
+    return {
+        "cp": cp,
+        "w_prime": w_prime,
+        "r2": np.where(valid, r2, np.nan),
+        "rmse": np.where(valid, rmse, np.nan),
+        "see": np.where(valid, see, np.nan),
+        "n": n.astype(np.int64),
+    }
+
+
+def fit_cp3(durations, powers, min_duration=1, max_duration=None, k_grid=DEFAULT_K_GRID, refine=DEFAULT_K_REFINE):
+    """3-Parameter-Modell (Morton) ``P(t) = CP + W'/(t + k)`` mit ``k = W'/(Pmax - CP)``.
+
+    Für festes ``k`` ist das Modell linear in (CP, W') und wird geschlossen
+    gelöst, für alle Zeilen gleichzeitig. ``k`` wird erst auf ``k_grid``
+    gesucht und dann pro Zeile mit ``refine`` Stützstellen zwischen den
+    Nachbarn des besten Grobwerts verfeinert; es gewinnt die kleinste
+    Fehlerquadratsumme.
+
+    Rückgabe wie ``fit_cp2`` plus ``p_max`` (W) und ``k`` (s).
+    """
+    t, p, mask = _prepare(durations, powers, min_duration, max_duration)
+    shape = p.shape[:-1]
+    best = {"sse": np.full(shape, np.inf), "k": np.full(shape, np.nan), "cp": np.full(shape, np.nan),
+            "w_prime": np.full(shape, np.nan), "sst": np.full(shape, np.nan), "n": np.zeros(shape)}
+
+    def _try(k):
+        # k: Skalar oder Array der Form (...) – ein Kandidat pro Zeile
+        k = np.broadcast_to(np.asarray(k, dtype=np.float64), shape)
+        x = np.where(mask, 1.0 / (t + k[..., None]), 0.0)
+        cp, w_prime, sse, sst, n = _linear_fit(x, p, mask)
+        # Physikalisch unsinnige Lösungen (W' <= 0) verwerfen
+        sse = np.where(np.isfinite(cp) & (w_prime > 0), sse, np.inf)
+        better = sse < best["sse"]
+        for name, value in (("sse", sse), ("k", k), ("cp", cp), ("w_prime", w_prime), ("sst", sst), ("n", n)):
+            best[name] = np.where(better, value, best[name])
+
+    k_grid = np.asarray(k_grid, dtype=np.float64)
+    for k in k_grid:
+        _try(k)
+    if refine and len(k_grid) > 1:
+        # Verfeinerung im Intervall zwischen den Nachbarn des besten Grobwerts
+        ratio = k_grid[1] / k_grid[0]
+        k0 = np.where(np.isfinite(best["k"]), best["k"], k_grid[0])
+        for f in np.geomspace(1 / ratio, ratio, refine):
+            _try(k0 * f)
+
+    n = best["n"]
+    valid = np.isfinite(best["sse"]) & (n >= 3)
+    r2, rmse, see = _goodness(np.where(valid, best["sse"], np.nan), best["sst"], n, 3)
+    nan = lambda a: np.where(valid, a, np.nan)
+    return {
+        "cp": nan(best["cp"]),
+        "w_prime": nan(best["w_prime"]),
+        "p_max": nan(best["cp"] + best["w_prime"] / best["k"]),
+        "k": nan(best["k"]),
+        "r2": nan(r2),
+        "rmse": nan(rmse),
+        "see": nan(see),
+        "n": n.astype(np.int64),
+    }
+
+
+def fit_cp_dict(power_dict, model=2, **kwargs):
+    """Komfortvariante für ein einzelnes ``{dauer: leistung}``-Dict (wie in den Apps); liefert Floats."""
+    durations = np.array(list(power_dict.keys()), dtype=np.float64)
+    powers = np.array([np.nan if v is None else v for v in power_dict.values()], dtype=np.float64)
+    fit = fit_cp2(durations, powers, **kwargs) if model == 2 else fit_cp3(durations, powers, **kwargs)
+    return {name: float(value) for name, value in fit.items()}
@@ -0,0 +1,230 @@
+import struct
+import time
+import tracemalloc
+from array import array
+
+import numpy as np
+
+# Sekunden zwischen Unix-Epoche und FIT-Epoche (1989-12-31 00:00 UTC)
+FIT_EPOCH = 631065600
+
+RECORD_MESG = 20
+TIMESTAMP_FIELD = 253
+
+# Kanäle der "record"-Nachricht: Name -> (Feldnummer, struct-Code, NumPy-Typ, Invalid-Wert laut FIT-Profil)
+RECORD_CHANNELS = {
+    "timestamp": (TIMESTAMP_FIELD, "I", np.uint32, 0xFFFFFFFF),
+    "heart_rate": (3, "B", np.uint8, 0xFF),
+    "cadence": (4, "B", np.uint8, 0xFF),
+    "power": (7, "H", np.uint16, 0xFFFF),
+}
+
+DEFAULT_CHANNELS = ("timestamp", "power", "heart_rate", "cadence")
+
+_STRUCT_SIZE = {"B": 1, "H": 2, "I": 4}
+_ARRAY_CODE = {np.uint8: "B", np.uint16: "H", np.uint32: "I"}
+
+
+def _read_bytes(source):
+    # Akzeptiert bytes, Pfad oder Datei-Objekt (z. B. Streamlit-Upload)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source.read()
+
+
+def _decode_definition(data, pos, header, channels):
+    # Liefert (neue Position, Definition). Die Definition enthält ein vorkompiliertes
+    # struct-Format, das nur die gewünschten Felder auspackt und den Rest überspringt.
+    arch = data[pos + 1]
+    endian = ">" if arch == 1 else "<"
+    global_num = struct.unpack_from(endian + "H", data, pos + 2)[0]
+    n_fields = data[pos + 4]
+    pos += 5
+
+    is_record = global_num == RECORD_MESG
+    fmt = [endian]
+    slots = {}
+    ts_slot = None
+    n_values = 0
+    for _ in range(n_fields):
+        field_num, size, _base_type = data[pos], data[pos + 1], data[pos + 2]
+        pos += 3
+        code = None
+        if field_num == TIMESTAMP_FIELD and size == 4:
+            code = "I"
+            ts_slot = n_values
+        elif is_record:
+            for name in channels:
+                num, c, _, _ = RECORD_CHANNELS[name]
+                if num == field_num and _STRUCT_SIZE[c] == size:
+                    code = c
+                    slots[name] = n_values
+                    break
+        if code is None:
+            fmt.append(f"{size}x")
+        else:
+            fmt.append(code)
+            n_values += 1
+
+    if header & 0x20:  # Developer-Felder: nur überspringen
+        n_dev = data[pos]
+        pos += 1
+        for _ in range(n_dev):
+            fmt.append(f"{data[pos + 1]}x")
+            pos += 3
+
+    return pos, (is_record, struct.Struct("".join(fmt)), slots, ts_slot)
+
+
+def _decode_file(data, pos, end, channels, out):
+    definitions = {}
+    last_ts = None
+    invalid = {name: RECORD_CHANNELS[name][3] for name in channels}
+    value_channels = tuple(name for name in channels if name != "timestamp")
+    appends = {name: out[name].append for name in channels}
+    append_ts = appends.get("timestamp")
+
+    while pos < end:
+        header = data[pos]
+        pos += 1
+
+        compressed_ts = None
+        if header & 0x80:
+            # Compressed Timestamp Header: 5-Bit-Offset relativ zum letzten Zeitstempel
+            local = (header >> 5) & 0x03
+            if last_ts is not None:
+                offset = header & 0x1F
+                compressed_ts = (last_ts & ~0x1F) + offset
+                if offset < (last_ts & 0x1F):
+                    compressed_ts += 0x20
+                last_ts = compressed_ts
+        elif header & 0x40:
+            pos, definitions[header & 0x0F] = _decode_definition(data, pos, header, channels)
+            continue
+        else:
+            local = header & 0x0F
+
+        try:
+            is_record, st_, slots, ts_slot = definitions[local]
+        except KeyError:
+            raise ValueError(f"Datennachricht ohne Definition (local {local}) an Position {pos - 1}")
+        values = st_.unpack_from(data, pos)
+        pos += st_.size
+
+        if ts_slot is not None:
+            ts = values[ts_slot]
+            if ts != 0xFFFFFFFF:
+                last_ts = ts
+                compressed_ts = ts
+
+        if not is_record:
+            continue
+        for name in value_channels:
+            slot = slots.get(name)
+            appends[name](values[slot] if slot is not None else invalid[name])
+        if append_ts is not None:
+            append_ts(compressed_ts if compressed_ts is not None else 0xFFFFFFFF)
+
+    return pos
+
+
+def decode_fit(source, channels=DEFAULT_CHANNELS):
+    """Dekodiert nur die gewünschten Kanäle der "record"-Nachrichten in NumPy-Arrays.
+
+    Statt für jedes Feld jedes Samples ein Python-Objekt zu erzeugen
+    (``fitparse``: ``get_values()`` / ``get_value()``), wird pro Definition ein
+    ``struct``-Format kompiliert, das nur die angeforderten Felder auspackt. Die
+    Werte landen direkt in kompakten ``array``-Puffern.
+
+    Rückgabe: Dict ``{kanal: np.ndarray}`` mit gleicher Länge pro Kanal
+    (ein Eintrag pro record). Typen: timestamp uint32 (Sekunden seit FIT-Epoche,
+    siehe ``FIT_EPOCH``), power uint16, heart_rate/cadence uint8. Fehlende
+    Werte tragen den FIT-Invalid-Wert (``RECORD_CHANNELS[kanal][3]``).
+    """
+    channels = tuple(channels)
+    for name in channels:
+        if name not in RECORD_CHANNELS:
+            raise ValueError(f"Unbekannter Kanal: {name}")
+    data = _read_bytes(source)
+    out = {name: array(_ARRAY_CODE[RECORD_CHANNELS[name][2]]) for name in channels}
+
+    if len(data) < 12:
+        raise ValueError("Keine gültige FIT-Datei (zu kurz)")
+    pos = 0
+    # Mehrere FIT-Dateien können hintereinander gehängt sein
+    while pos + 12 <= len(data):
+        header_size = data[pos]
+        if data[pos + 8:pos + 12] != b".FIT":
+            raise ValueError("Keine gültige FIT-Datei (Header-Signatur fehlt)")
+        data_size = struct.unpack_from("<I", data, pos + 4)[0]
+        start = pos + header_size
+        end = min(start + data_size, len(data))
+        _decode_file(data, start, end, channels, out)
+        pos = end + 2  # CRC überspringen
+
+    return {
+        name: np.frombuffer(buf, dtype=RECORD_CHANNELS[name][2]) if len(buf) else np.empty(0, dtype=RECORD_CHANNELS[name][2])
+        for name, buf in out.items()
+    }
+
+
+def valid_mask(streams, channel):
+    # True, wo der Kanal einen gültigen Wert hat
+    return streams[channel] != RECORD_CHANNELS[channel][3]
+
+
+def power_values(streams):
+    # Gültige Leistungswerte in Aufzeichnungsreihenfolge (wie das alte extract_series)
+    power = streams["power"]
+    return power[valid_mask(streams, "power")]
+
+
+def heart_rate_values(streams):
+    # Gültige Herzfrequenzwerte (> 0 bpm)
+    hr = streams["heart_rate"]
+    return hr[valid_mask(streams, "heart_rate") & (hr > 0)]
+
+
+def decode_fit_profiled(source, channels=DEFAULT_CHANNELS):
+    """Wie ``decode_fit``, liefert zusätzlich ``{"parse_s": …, "peak_mb": …}``."""
+    data = _read_bytes(source)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        streams = decode_fit(data, channels)
+        parse_s = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return streams, {"parse_s": parse_s, "peak_mb": peak / 1e6}
+
+
+def compare_with_fitparse(source):
+    # Referenzmessung: bisherige fitparse-Schleife vs. decode_fit (Zeit + Peak-Speicher)
+    import io
+    from fitparse import FitFile
+
+    data = _read_bytes(source)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        fitfile = FitFile(io.BytesIO(data))
+        records = [r.get_values() for r in fitfile.get_messages("record")]
+        ref_s = time.perf_counter() - t0
+        _, ref_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    _, stats = decode_fit_profiled(data)
+    return {
+        "records": len(records),
+        "fitparse_s": ref_s,
+        "fitparse_peak_mb": ref_peak / 1e6,
+        "decoder_s": stats["parse_s"],
+        "decoder_peak_mb": stats["peak_mb"],
+    }
@@ -0,0 +1,112 @@
+"""Prozessweites, lazy geladenes Register der ML-Modelle (VLamax, VO₂max).
+
+Ein Modell wird erst bei der ersten Vorhersage deserialisiert und dann im
+Prozess gehalten (Streamlit-Reruns, mehrere Apps im selben Server). Ändert
+sich die Datei (mtime/Größe, dann SHA-256), wird beim nächsten Zugriff neu
+geladen – z. B. nachdem ``vo2max_trainer_app.py`` neu trainiert hat.
+"""
+import hashlib
+import os
+import threading
+import time
+
+from stage_profiler import current_rss_mb
+from startup_timing import lazy_import
+
+# Verzeichnis der .joblib-Dateien; Standard wie bisher das Arbeitsverzeichnis
+DEFAULT_MODEL_DIR = os.environ.get("POWERPROFILE_MODEL_DIR", ".")
+
+MODELS = {
+    "vlamax": "vlamax_model.joblib",
+    "vo2max": "vo2_model.joblib",
+}
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, model_dir=DEFAULT_MODEL_DIR, models=None):
+        self.model_dir = model_dir
+        self.files = dict(MODELS if models is None else models)
+        self._lock = threading.Lock()
+        self._entries = {}  # name -> {"model", "stat", "sha256", "load_s", "mb", "loaded_at"}
+
+    def path(self, name):
+        return os.path.join(self.model_dir, self.files[name])
+
+    def get(self, name):
+        """Das Modell ``name`` oder ``None``, wenn die Datei fehlt."""
+        path = self.path(name)
+        try:
+            st_ = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(name, None)
+            return None
+        stat = (st_.st_mtime_ns, st_.st_size)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry["stat"] == stat:
+                return entry["model"]
+            digest = _sha256(path)
+            if entry is not None and entry["sha256"] == digest:
+                # nur berührt, Inhalt gleich: nicht neu laden
+                entry["stat"] = stat
+                return entry["model"]
+            entry = self._load(path, stat, digest)
+            self._entries[name] = entry
+            return entry["model"]
+
+    @staticmethod
+    def _load(path, stat, digest):
+        joblib = lazy_import("joblib")
+
+        # Ohne tracemalloc: Ladezeit unverfälscht, Speicher als Änderung des aktuellen RSS (Näherung)
+        rss0 = current_rss_mb()
+        t0 = time.perf_counter()
+        model = joblib.load(path)
+        load_s = time.perf_counter() - t0
+        mb = None if rss0 is None else current_rss_mb() - rss0
+        return {"model": model, "stat": stat, "sha256": digest, "load_s": load_s, "mb": mb, "loaded_at": time.time()}
+
+    def predict(self, name, features):
+        model = self.get(name)
+        if model is None:
+            raise ValueError(f"❌ Modell '{name}' nicht gefunden. Bitte '{self.path(name)}' bereitstellen.")
+        return model.predict(features)
+
+    def save(self, name, model):
+        """Speichert ein (neu trainiertes) Modell atomar; andere Prozesse laden es beim nächsten Zugriff."""
+        joblib = lazy_import("joblib")
+
+        path = self.path(name)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        joblib.dump(model, tmp)
+        os.replace(tmp, path)
+
+    def stats(self):
+        # Ladezeit und Speicher je geladenem Modell (z. B. für eine Debug-Ansicht)
+        with self._lock:
+            return [
+                {"Modell": name, "Datei": self.files[name], "Ladezeit (s)": round(e["load_s"], 3),
+                 "Datei (MB)": round(e["stat"][1] / 1e6, 1),
+                 "RSS-Δ (MB)": None if e["mb"] is None else round(e["mb"], 1), "SHA-256": e["sha256"][:12]}
+                for name, e in self._entries.items()
+            ]
+
+
+_default_registry = None
+
+
+def get_registry():
+    # Prozessweites Register, analog zu activity_cache.get_cache
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ModelRegistry()
+    return _default_registry
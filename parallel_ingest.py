@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from activity_cache import analyse_bytes, file_hash, get_cache
+from stage_profiler import traced_peak
+
+# Anzahl Worker-Prozesse; Standard: alle verfügbaren Kerne
+DEFAULT_WORKERS = int(os.environ.get("POWERPROFILE_WORKERS", "0")) or os.cpu_count() or 1
+# Startmethode der Worker-Pools: die Pools entstehen im Streamlit-Server (viele Threads), ein fork
+# von dort kann an Sperren anderer Threads hängen bleiben – daher standardmäßig "spawn"
+START_METHOD = os.environ.get("POWERPROFILE_START_METHOD", "spawn")
+
+
+def mp_context():
+    return multiprocessing.get_context(START_METHOD)
+
+
+def _analyse_worker(key, data, memory=False):
+    # Läuft im Worker-Prozess: dekodieren + MMP, Ergebnis auf die Festplatte cachen.
+    # Fehler werden als Text zurückgegeben, damit ein defektes File den Pool nicht abbricht.
+    # Zusätzlich Wand-/CPU-Zeit (ms) und mit ``memory`` der Peak (MB) im Worker für das Profiling.
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    with traced_peak(memory) as mem:
+        try:
+            entry = analyse_bytes(data)
+            get_cache().put(key, entry)
+            result = entry, None
+        except Exception as e:
+            result = None, str(e)
+    return (*result, ((time.perf_counter() - wall0) * 1000, (time.process_time() - cpu0) * 1000, mem["peak_mb"]))
+
+
+def _read_upload(file):
+    if isinstance(file, tuple):
+        return file
+    return file.name, file.getvalue()
+
+
+def ingest_files(files, max_workers=None, progress=None, profiler=None):
+    """Dekodiert und analysiert mehrere FIT-Dateien parallel in einem Prozess-Pool.
+
+    ``files``: Streamlit-Uploads oder ``(name, bytes)``-Tupel. Bereits gecachte
+    Dateien (Speicher oder Festplatte) werden gar nicht erst verteilt.
+    ``progress(erledigt, gesamt)`` wird nach jeder Datei aufgerufen.
+    Mit ``profiler`` (``stage_profiler.StageProfiler``) wird je dekodierter Datei
+    die Wand-/CPU-Zeit (im Debug-Modus auch der Peak-Speicher) im Worker als
+    Stufe "Dekodieren + MMP" erfasst.
+
+    Rückgabe: Liste ``(name, activity, fehler)`` in Upload-Reihenfolge;
+    ``activity`` hat die Form von ``activity_cache.load_activity`` oder ist
+    ``None``, wenn die Datei nicht verarbeitet werden konnte.
+    """
+    cache = get_cache()
+    max_workers = max_workers or DEFAULT_WORKERS
+    memory = profiler is not None and profiler.enabled and profiler.memory
+
+    jobs = []
+    results = []
+    for file in files:
+        name, data = _read_upload(file)
+        key = file_hash(data)
+        entry = cache.get(key)
+        if entry is not None:
+            results.append((name, {"key": key, **entry}, None))
+        else:
+            results.append(None)
+            jobs.append((len(results) - 1, name, key, data))
+
+    total = len(results)
+    done = total - len(jobs)
+    if progress:
+        progress(done, total)
+
+    def _collect(i, name, key, entry, error, timing=None):
+        if profiler is not None and timing is not None:
+            profiler.add("Dekodieren + MMP", name, *timing)
+        if entry is not None:
+            cache.put(key, entry, disk=False)
+            results[i] = (name, {"key": key, **entry}, None)
+        else:
+            results[i] = (name, None, error)
+
+    if max_workers <= 1 or len(jobs) <= 1:
+        for i, name, key, data in jobs:
+            _collect(i, name, key, *_analyse_worker(key, data, memory))
+            done += 1
+            if progress:
+                progress(done, total)
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs)), mp_context=mp_context()) as pool:
+        futures = {pool.submit(_analyse_worker, key, data, memory): (i, name, key) for i, name, key, data in jobs}
+        for future in as_completed(futures):
+            i, name, key = futures[future]
+            try:
+                entry, error, timing = future.result()
+            except Exception as e:  # z. B. abgestürzter Worker
+                entry, error, timing = None, str(e), None
+            _collect(i, name, key, entry, error, timing)
+            done += 1
+            if progress:
+                progress(done, total)
+    return results
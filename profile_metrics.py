@@ -0,0 +1,68 @@
+import numpy as np
+from cp_model import fit_cp_dict
+
+# Stützstellen (s) für Bestwerte und CP-Modell
+durations = [20, 30, 60, 180, 240, 300, 600, 720, 900, 1200, 1800]
+
+def estimate_cp_model(power_dict):
+    # CP = Achsenabschnitt von P über 1/t, nur ab 3min sinnvoll für CP; NaN bei < 2 Punkten
+    return fit_cp_dict(power_dict, min_duration=180)["cp"]
+
+def estimate_cp_params(power_dict):
+    # Wie estimate_cp_model, zusätzlich W' (J) und Güte (r2, rmse)
+    return fit_cp_dict(power_dict, min_duration=180)
+
+def estimate_vo2max_5min(power_300, weight):
+    # VO2max (absolut): VO2 [L/min] ≈ 0.01141 × P5min + 0.435; elementweise für Arrays, NaN bleibt NaN
+    vo2_abs = 0.01141 * power_300 + 0.435
+    vo2_rel = vo2_abs * 1000 / weight
+    return vo2_abs, vo2_rel
+
+def estimate_vlamax(ffm, duration, avg, peak, geschlecht_code):
+    # Regression basierend auf deiner letzten Formel
+    return (
+        0.004385289349914 * ffm +
+        0.002030356114603 * duration +
+        0.000413636126981 * avg +
+        -0.000192203134232 * peak +
+        0.055897283917473 * geschlecht_code +
+        -0.141169048396927
+    )
+
+def power_zones(ftp):
+    # Leistungszonen (W) relativ zur FTP; obere Grenze von Zone 7 offen (NaN)
+    return {
+        "Zone 1 (Aktive Erholung)": (0, 0.55 * ftp),
+        "Zone 2 (Grundlagenausdauer)": (0.56 * ftp, 0.75 * ftp),
+        "Zone 3 (Tempo)": (0.76 * ftp, 0.9 * ftp),
+        "Zone 4 (Schwelle)": (0.91 * ftp, 1.05 * ftp),
+        "Zone 5 (VO₂max)": (1.06 * ftp, 1.20 * ftp),
+        "Zone 6 (Anaerob)": (1.21 * ftp, 1.50 * ftp),
+        "Zone 7 (Neuromuskulär)": (1.51 * ftp, np.nan)
+    }
+
+def heart_rate_zones(hr_max):
+    # Herzfrequenzzonen (bpm) relativ zur HFmax
+    return {
+        "Zone 1 (Regeneration)": (0, 0.6 * hr_max),
+        "Zone 2 (Grundlage)": (0.61 * hr_max, 0.7 * hr_max),
+        "Zone 3 (aerob)": (0.71 * hr_max, 0.8 * hr_max),
+        "Zone 4 (Schwelle)": (0.81 * hr_max, 0.89 * hr_max),
+        "Zone 5 (VO₂max)": (0.90 * hr_max, hr_max),
+    }
+
+def athlete_type(vo2_rel, vlamax, ftp_wkg):
+    # Typzuordnung aus VO2max (ml/min/kg), VLamax (mmol/l/s) und FTP (W/kg); NaN-Vergleiche fallen auf "Allrounder"
+    if vo2_rel >= 70 and vlamax <= 0.4 and ftp_wkg >= 4.8:
+        return "Bergfahrer"
+    if vo2_rel >= 65 and vlamax <= 0.35:
+        return "Zeitfahrer"
+    if vlamax >= 0.6 and ftp_wkg < 4.0:
+        return "Sprinter"
+    if vo2_rel >= 65 and vlamax >= 0.5 and ftp_wkg >= 4.5:
+        return "MTB XCO"
+    if vo2_rel >= 60 and vlamax <= 0.5 and ftp_wkg >= 4.2:
+        return "Marathon MTB"
+    if vo2_rel >= 60 and vlamax >= 0.5:
+        return "Kriterium"
+    return "Allrounder"
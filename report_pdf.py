@@ -0,0 +1,163 @@
+"""PDF-Leistungsreport, im Speicher gerendert und nach Eingaben gecacht.
+
+``render_report`` erzeugt die PDF-Bytes ohne temporäre Datei; ``get_report``
+rendert nur, wenn sich die Report-Eingaben (Hash) geändert haben. Für viele
+Athleten verteilt ``render_reports`` das Rendern auf mehrere Prozesse.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from parallel_ingest import DEFAULT_WORKERS, mp_context
+from startup_timing import lazy_import
+
+# Anzahl gecachter Reports im Prozess (je ~2 KB)
+DEFAULT_MAX_REPORTS = 256
+
+
+def report_inputs(ftp, vo2_abs, vo2_rel, vlamax, zones=None, hr_max=0, hr_zones=None, title="Leistungsanalyse"):
+    """Alle Werte, die in den Report eingehen, als JSON-fähiges Dict (Schlüssel für den Cache)."""
+    def num(x):
+        return None if x is None or not np.isfinite(x) else round(float(x), 4)
+
+    return {
+        "title": title,
+        "ftp": num(ftp),
+        "vo2_abs": num(vo2_abs),
+        "vo2_rel": num(vo2_rel),
+        "vlamax": num(vlamax),
+        "zones": [[z, num(low), num(high)] for z, (low, high) in (zones or {}).items()],
+        "hr_max": int(hr_max),
+        "hr_zones": [[z, num(low), num(high)] for z, (low, high) in (hr_zones or {}).items()],
+    }
+
+
+def report_key(inputs):
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _latin1(text):
+    # Die Standardschriften von FPDF kennen nur Latin-1 (z. B. kein "₂")
+    return text.replace("₂", "2").encode("latin-1", "replace").decode("latin-1")
+
+
+def render_report(inputs):
+    """Rendert den Report zu PDF-Bytes (ohne Datei auf der Festplatte)."""
+    FPDF = lazy_import("fpdf").FPDF
+
+    class PowerReportPDF(FPDF):
+        def header(self):
+            self.set_font("Arial", "B", 14)
+            self.cell(0, 10, _latin1(inputs["title"]), ln=True, align="C")
+            self.ln(5)
+
+        def section_title(self, title):
+            self.set_font("Arial", "B", 12)
+            self.set_fill_color(240, 240, 240)
+            self.cell(0, 10, _latin1(title), ln=True, fill=True)
+            self.ln(1)
+
+        def print_parameter(self, label, value):
+            self.set_font("Arial", "", 11)
+            self.cell(0, 8, _latin1(f"{label}: {value}"), ln=True)
+
+    ftp = inputs["ftp"]
+    pdf = PowerReportPDF()
+    pdf.add_page()
+    pdf.section_title("Erkannte Leistungsdaten")
+    pdf.print_parameter("FTP", f"{ftp:.0f} W" if ftp is not None else "nicht verfügbar")
+    pdf.print_parameter("VO2max (absolut)", f"{inputs['vo2_abs']:.2f} L/min" if inputs["vo2_abs"] is not None else "nicht verfügbar")
+    pdf.print_parameter("VO2max (relativ)", f"{inputs['vo2_rel']:.0f} ml/min/kg" if inputs["vo2_rel"] is not None else "nicht verfügbar")
+    pdf.print_parameter("VLamax", f"{inputs['vlamax']:.2f} mmol/l/s" if inputs["vlamax"] is not None else "nicht verfügbar")
+
+    if ftp is not None and inputs["zones"]:
+        pdf.section_title("Trainingszonen (Leistung)")
+        for z, low, high in inputs["zones"]:
+            pdf.print_parameter(z, f"{int(low)}-{int(high)} W" if high is not None else f"ab {int(low)} W")
+
+    if inputs["hr_max"] > 0:
+        pdf.section_title("Herzfrequenz-Zonen")
+        pdf.print_parameter("HFmax", f"{inputs['hr_max']} bpm")
+        for z, low, high in inputs["hr_zones"]:
+            pdf.print_parameter(z, f"{int(low)}-{int(high)} bpm")
+
+    out = pdf.output(dest="S")
+    # fpdf 1.x liefert str (Latin-1), fpdf2 bytearray
+    return out.encode("latin-1") if isinstance(out, str) else bytes(out)
+
+
+class ReportCache:
+    """LRU-Cache ``report_key -> PDF-Bytes``, prozessweit über Streamlit-Reruns und Sitzungen."""
+
+    def __init__(self, max_reports=DEFAULT_MAX_REPORTS):
+        self.max_reports = max_reports
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            pdf = self._reports.get(key)
+            if pdf is not None:
+                self._reports.move_to_end(key)
+            return pdf
+
+    def put(self, key, pdf):
+        with self._lock:
+            self._reports[key] = pdf
+            self._reports.move_to_end(key)
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+
+
+_default_cache = None
+
+
+def get_report_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ReportCache()
+    return _default_cache
+
+
+def get_report(inputs, cache=None):
+    """PDF-Bytes für ``inputs``; gerendert wird nur bei unbekanntem Eingabe-Hash."""
+    cache = cache or get_report_cache()
+    key = report_key(inputs)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = render_report(inputs)
+        cache.put(key, pdf)
+    return pdf
+
+
+def render_reports(inputs_list, max_workers=None, cache=None):
+    """Reports vieler Athleten; nicht gecachte werden parallel in Prozessen gerendert.
+
+    Rückgabe: Liste von PDF-Bytes in der Reihenfolge von ``inputs_list``.
+    """
+    cache = cache or get_report_cache()
+    keys = [report_key(inputs) for inputs in inputs_list]
+    result = [cache.get(k) for k in keys]
+    todo = {}
+    for i, (k, pdf) in enumerate(zip(keys, result)):
+        if pdf is None:
+            todo.setdefault(k, []).append(i)
+    if not todo:
+        return result
+
+    jobs = [(k, inputs_list[idx[0]]) for k, idx in todo.items()]
+    max_workers = min(max_workers or DEFAULT_WORKERS, len(jobs))
+    if max_workers <= 1:
+        rendered = [render_report(inputs) for _, inputs in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context()) as pool:
+            rendered = list(pool.map(render_report, [inputs for _, inputs in jobs], chunksize=max(1, len(jobs) // (4 * max_workers))))
+    for (k, _), pdf in zip(jobs, rendered):
+        cache.put(k, pdf)
+        for i in todo[k]:
+            result[i] = pdf
+    return result
@@ -0,0 +1,89 @@
+import numpy as np
+
+from fit_decoder import RECORD_CHANNELS
+
+# Lücken bis einschließlich dieser Länge (s) werden linear interpoliert,
+# längere (Pausen, Kaffeestopp) mit 0 aufgefüllt
+DEFAULT_MAX_INTERPOLATE_S = 5
+
+
+def resample_1hz(timestamps, channels, max_interpolate=DEFAULT_MAX_INTERPOLATE_S, gap_fill=0.0):
+    """Bringt Kanäle (z. B. power, heart_rate) auf ein lückenloses 1-s-Raster.
+
+    Ersatz für ``df.resample("1s").mean().interpolate()``: arbeitet nur auf den
+    übergebenen Kanälen statt auf allen FIT-Feldern und interpoliert nicht über
+    Pausen. Behandelt
+
+    - doppelte Zeitstempel: Mittelwert pro Sekunde (wie ``resample().mean()``),
+    - Smart Recording: Lücken ``<= max_interpolate`` s werden linear interpoliert,
+    - Pausen: längere Lücken werden mit ``gap_fill`` gefüllt (Standard 0 W/0 bpm;
+      ``None`` = die Sekunden werden ganz weggelassen; fehlt nur ein Kanal
+      länger als ``max_interpolate``, ist er dort NaN).
+
+    ``timestamps``: Sekunden (beliebige Epoche), nicht zwingend sortiert.
+    ``channels``: Dict ``{name: array}`` gleicher Länge. Ungültige FIT-Werte
+    (``RECORD_CHANNELS``) gelten als fehlend.
+
+    Rückgabe: ``(t, {name: float64-Array})`` mit ``t`` als int64-Sekunden.
+    """
+    ts = np.asarray(timestamps).astype(np.int64)
+    n = len(ts)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), {name: np.empty(0) for name in channels}
+
+    order = None
+    if (np.diff(ts) < 0).any():
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+    # Eindeutige Sekunden; ``first`` gruppiert doppelte Zeitstempel
+    uniq, first = np.unique(ts, return_index=True)
+    t = np.arange(uniq[0], uniq[-1] + 1, dtype=np.int64)
+    pos = uniq - uniq[0]  # Index der Stützstellen im Raster
+
+    common_pause = None
+    out = {}
+    for name, values in channels.items():
+        v = np.asarray(values)
+        if order is not None:
+            v = v[order]
+        valid = np.ones(n, dtype=bool)
+        if name in RECORD_CHANNELS:
+            valid = v != RECORD_CHANNELS[name][3]
+        v = np.where(valid, v, 0).astype(np.float64)
+        # Mittelwert pro Sekunde über die gültigen Werte
+        sums = np.add.reduceat(v, first)
+        cnt = np.add.reduceat(valid.astype(np.int64), first)
+        have = cnt > 0
+        sample_pos = pos[have]
+        if len(sample_pos) == 0:
+            out[name] = np.full(len(t), np.nan if gap_fill is None else gap_fill)
+            continue
+        grid = np.interp(np.arange(len(t)), sample_pos, sums[have] / cnt[have])
+        if have.all():
+            # Kanal ohne Aussetzer: Pausen wie im Zeitraster, nur einmal berechnen
+            if common_pause is None:
+                common_pause = _pause_mask(pos, len(t), max_interpolate)
+            pause = common_pause
+        else:
+            pause = _pause_mask(sample_pos, len(t), max_interpolate)
+        if gap_fill is not None:
+            grid[pause] = gap_fill
+        elif not have.all():
+            # Kanal fehlt länger, obwohl Zeitstempel da sind (z. B. HF-Gurt): dort NaN statt interpoliert
+            grid[pause] = np.nan
+        out[name] = grid
+
+    if gap_fill is None:
+        keep = ~(common_pause if common_pause is not None else _pause_mask(pos, len(t), max_interpolate))
+        t = t[keep]
+        out = {name: grid[keep] for name, grid in out.items()}
+    return t, out
+
+
+def _pause_mask(sample_pos, length, max_interpolate):
+    # True für Rastersekunden ohne Sample, die in einer Lücke > max_interpolate liegen
+    idx = np.arange(length)
+    nxt = np.minimum(np.searchsorted(sample_pos, idx, side="left"), len(sample_pos) - 1)
+    prv = np.maximum(np.searchsorted(sample_pos, idx, side="right") - 1, 0)
+    on_sample = sample_pos[nxt] == idx
+    return ~on_sample & (sample_pos[nxt] - sample_pos[prv] > max_interpolate)
@@ -0,0 +1,100 @@
+"""Prozessweiter Ergebnis-Cache für abgeleitete Kennzahlen (z. B. CP-Fit).
+
+Schlüssel sind explizit ``(stufe, schlüssel)``, z. B. ``("cp", (sha256, ...))``
+über die SHA-256 der beteiligten Fahrten. Der Cache liegt im Modul und gilt
+damit für alle Sitzungen und Nutzer desselben Streamlit-Servers; er ist in
+der Größe begrenzt (LRU) und zählt Treffer/Fehlschläge je Stufe.
+"""
+import sys
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+from activity_cache import get_cache
+
+DEFAULT_MAX_MEMORY_MB = 64
+
+
+def _nbytes(value):
+    # Grobe Größe eines Ergebnisses (Arrays genau, sonst sys.getsizeof rekursiv über Container)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(k) + _nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    def __init__(self, max_memory_mb=DEFAULT_MAX_MEMORY_MB):
+        self.max_bytes = int(max_memory_mb * 1e6)
+        self._entries = OrderedDict()  # (stufe, key) -> (wert, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+
+    def get(self, stage, key, default=None):
+        with self._lock:
+            item = self._entries.get((stage, key))
+            if item is None:
+                self._misses[stage] += 1
+                return default
+            self._entries.move_to_end((stage, key))
+            self._hits[stage] += 1
+            return item[0]
+
+    def put(self, stage, key, value):
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop((stage, key), None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[(stage, key)] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def cached(self, stage, key, compute):
+        """Ergebnis von ``compute()`` unter ``(stage, key)``; berechnet nur beim ersten Mal."""
+        sentinel = object()
+        value = self.get(stage, key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(stage, key, value)
+        return value
+
+    def stats(self):
+        # Treffer/Fehlschläge je Stufe und belegter Speicher
+        with self._lock:
+            stages = sorted(set(self._hits) | set(self._misses))
+            return {
+                "stages": {s: {"hits": self._hits[s], "misses": self._misses[s]} for s in stages},
+                "entries": len(self._entries),
+                "mb": self._bytes / 1e6,
+            }
+
+
+_default_cache = None
+
+
+def get_result_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
+
+
+def cache_table():
+    """Zeilen für eine Übersicht aller Cache-Stufen (Dekodieren + MMP und abgeleitete Ergebnisse)."""
+    a = get_cache().stats()
+    rows = [{"Stufe": "Dekodieren + MMP", "Treffer": a["hits_memory"] + a["hits_disk"],
+             "davon Festplatte": a["hits_disk"], "Fehlschläge": a["misses"]}]
+    for stage, c in get_result_cache().stats()["stages"].items():
+        rows.append({"Stufe": stage, "Treffer": c["hits"], "davon Festplatte": 0, "Fehlschläge": c["misses"]})
+    return rows
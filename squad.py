@@ -0,0 +1,153 @@
+"""Profile für ganze Teams: ein Athlet pro Worker-Prozess.
+
+Quelle der Fahrten je Athlet ist entweder ein ``ActivityArchive`` (Einträge
+des Athleten) oder ein Upload-Ordner mit FIT-Dateien. Jeder Worker liefert
+nur eine Ergebniszeile (MMP, CP, W′, VO₂max, VLamax, Athletentyp), die
+Wandzeit sinkt damit mit der Zahl der Kerne statt mit der Teamgröße zu
+steigen.
+"""
+import datetime as dt
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from activity import POWER_INVALID
+from activity_archive import ActivityArchive
+from activity_cache import best_from_curve, load_activity
+from athlete_store import ride_date
+from batch_analyse import iter_fit_files
+from mmp import best_powers
+from parallel_ingest import DEFAULT_WORKERS, mp_context
+from profile_metrics import athlete_type, durations, estimate_cp_params, estimate_vlamax, estimate_vo2max_5min
+
+# Spalten der Ranglisten-Tabelle, in Anzeigereihenfolge
+COLUMNS = [
+    "Athlet", "Fahrten", "CP (W)", "CP (W/kg)", "W′ (kJ)", "MMP 20s (W)", "MMP 1min (W)", "MMP 5min (W)",
+    "MMP 20min (W)", "VO₂max (ml/min/kg)", "VLamax (mmol/l/s)", "Typ", "Fehler",
+]
+
+# Benötigte Dauern (s): CP-Fit-Stützstellen plus Tabellenspalten
+DAUERN = sorted(set(durations) | {1, 60, 300, 1200})
+
+_archive = None
+
+
+def _archive_bests(path, athlete, since):
+    # Pro Fahrt nur die benötigten Dauern (best_powers, O(n) je Dauer) statt der vollen MMP-Kurve
+    global _archive
+    if _archive is None or _archive.path != path:
+        _archive = ActivityArchive(path)  # ein Mapping pro Worker-Prozess
+    for i in _archive.select(athlete=athlete, since=since):
+        power = _archive.channel_slice(i, "power")
+        yield best_powers(power[power != POWER_INVALID].astype(np.float64), DAUERN)
+
+
+def _folder_bests(folder, since, errors):
+    # Defekte Dateien werden übersprungen und in ``errors`` gesammelt, wie in batch_analyse/ingest_files
+    for path in iter_fit_files([folder]):
+        try:
+            with open(path, "rb") as f:
+                activity = load_activity(f.read())
+        except Exception as e:
+            errors.append(f"{os.path.basename(path)}: {e}")
+            continue
+        if since is not None:
+            datum = ride_date(activity["streams"])
+            if datum is not None and datum < since:
+                continue
+        # Kurve liegt im Aktivitäts-Cache ohnehin vor
+        yield best_from_curve(activity["curve"], DAUERN)
+
+
+def _combine(bests):
+    # Bestwert je Dauer über alle Fahrten (NaN, wenn keine Fahrt lang genug war)
+    return {d: max((b[d] for b in bests if np.isfinite(b.get(d, np.nan))), default=np.nan) for d in DAUERN}
+
+
+def athlete_profile(spec):
+    """Profil eines Athleten als Tabellenzeile.
+
+    ``spec``: Dict mit ``athlet``, ``gewicht``, ``koerperfett``, ``geschlecht``
+    ("Mann"/"Frau") und entweder ``archiv`` (Pfad) oder ``ordner`` (Pfad);
+    optional ``tage`` (nur Fahrten der letzten N Tage).
+    """
+    row = {"Athlet": spec["athlet"], "Fehler": ""}
+    errors = []
+    try:
+        since = dt.date.today() - dt.timedelta(days=spec["tage"] - 1) if spec.get("tage") else None
+        if spec.get("archiv"):
+            bests = list(_archive_bests(spec["archiv"], spec["athlet"], since))
+        else:
+            bests = list(_folder_bests(spec["ordner"], since, errors))
+        best = _combine(bests)
+        row["Fahrten"] = len(bests)
+        if errors:
+            row["Fehler"] = f"{len(errors)} Datei(en) übersprungen – " + "; ".join(errors)
+        if not np.isfinite(best[1]):
+            row["Fehler"] = "; ".join(filter(None, ["keine Leistungsdaten", row["Fehler"]]))
+            return row
+
+        gewicht = float(spec["gewicht"])
+        ffm = gewicht * (1 - float(spec["koerperfett"]) / 100)
+        geschlecht_code = 1 if str(spec["geschlecht"]).lower() == "frau" else 0
+        cp_fit = estimate_cp_params(best)
+        cp = cp_fit["cp"]
+        _, vo2_rel = estimate_vo2max_5min(best[300], gewicht)
+        vlamax = estimate_vlamax(ffm, 20, best[20], best[1], geschlecht_code)
+        row.update({
+            "CP (W)": cp,
+            "CP (W/kg)": cp / gewicht,
+            "W′ (kJ)": cp_fit["w_prime"] / 1000,
+            "MMP 20s (W)": best[20],
+            "MMP 1min (W)": best[60],
+            "MMP 5min (W)": best[300],
+            "MMP 20min (W)": best[1200],
+            "VO₂max (ml/min/kg)": vo2_rel,
+            "VLamax (mmol/l/s)": vlamax,
+            "Typ": athlete_type(vo2_rel, vlamax, cp / gewicht),
+        })
+    except Exception as e:
+        row["Fehler"] = str(e)
+    return row
+
+
+def squad_profiles(specs, max_workers=None, progress=None):
+    """Profile aller Athleten parallel in einem Prozess-Pool; Ergebnis in der Reihenfolge von ``specs``."""
+    specs = list(specs)
+    max_workers = min(max_workers or DEFAULT_WORKERS, max(len(specs), 1))
+    rows = [None] * len(specs)
+    if max_workers <= 1:
+        for i, spec in enumerate(specs):
+            rows[i] = athlete_profile(spec)
+            if progress:
+                progress(i + 1, len(specs))
+        return rows
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context()) as pool:
+        futures = {pool.submit(athlete_profile, spec): i for i, spec in enumerate(specs)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            try:
+                rows[i] = future.result()
+            except Exception as e:  # z. B. abgestürzter Worker
+                rows[i] = {"Athlet": specs[i]["athlet"], "Fehler": str(e)}
+            if progress:
+                progress(done, len(specs))
+    return rows
+
+
+def folder_specs(root, defaults):
+    # Ein Athlet pro Unterordner von ``root`` (Ordnername = Athlet)
+    return [
+        {**defaults, "athlet": name, "ordner": os.path.join(root, name)}
+        for name in sorted(os.listdir(root)) if os.path.isdir(os.path.join(root, name))
+    ]
+
+
+def rank(rows, by="CP (W/kg)", ascending=False):
+    """Sortiert Zeilen nach der numerischen Spalte ``by`` (fehlende Werte ans Ende) und ergänzt ``Rang``."""
+    ok, rest = [], []
+    for r in rows:
+        (ok if np.isfinite(float(r.get(by) or np.nan)) else rest).append(r)
+    ok.sort(key=lambda r: r[by], reverse=not ascending)
+    return [{"Rang": i, **r} for i, r in enumerate(ok, start=1)] + [{"Rang": None, **r} for r in rest]
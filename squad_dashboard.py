@@ -0,0 +1,53 @@
+import startup_timing
+import streamlit as st
+import pandas as pd
+import os
+from activity_archive import ActivityArchive, DEFAULT_ARCHIVE_DIR
+from squad import COLUMNS, folder_specs, rank, squad_profiles
+startup_timing.mark("Imports")
+
+st.set_page_config(page_title="Team-Dashboard", layout="wide")
+st.title("👥 Team-Dashboard: Leistungsprofile im Vergleich")
+
+quelle = st.radio("Fahrten aus", ["Archiv", "Upload-Ordner (ein Unterordner pro Athlet)"], horizontal=True)
+if quelle == "Archiv":
+    archiv_pfad = st.text_input("Archiv-Verzeichnis", DEFAULT_ARCHIVE_DIR)
+    athleten = ActivityArchive(archiv_pfad).athletes()
+else:
+    ordner = st.text_input("Team-Ordner", "")
+    athleten = [s["athlet"] for s in folder_specs(ordner, {})] if os.path.isdir(ordner) else []
+tage = st.selectbox("Zeitraum", [None, 42, 90, 365], format_func=lambda d: "gesamt" if d is None else f"letzte {d} Tage")
+
+if not athleten:
+    st.info("Keine Athleten gefunden.")
+else:
+    # Körperdaten je Athlet: editierbar oder als CSV (Athlet, Gewicht, Körperfett, Geschlecht)
+    kader_csv = st.file_uploader("Kaderliste (CSV, optional)", type=["csv"])
+    kader = pd.DataFrame({"Athlet": athleten, "Gewicht": 70.0, "Körperfett": 15.0, "Geschlecht": "Mann"})
+    if kader_csv is not None:
+        kader = kader[["Athlet"]].merge(pd.read_csv(kader_csv), on="Athlet", how="left").fillna(
+            {"Gewicht": 70.0, "Körperfett": 15.0, "Geschlecht": "Mann"})
+    kader = st.data_editor(kader, hide_index=True, disabled=["Athlet"])
+
+    if st.button(f"🚀 {len(kader)} Profile berechnen"):
+        specs = []
+        for k in kader.itertuples(index=False):
+            spec = {"athlet": k.Athlet, "gewicht": k.Gewicht, "koerperfett": k.Körperfett, "geschlecht": k.Geschlecht, "tage": tage}
+            if quelle == "Archiv":
+                spec["archiv"] = archiv_pfad
+            else:
+                spec["ordner"] = next(s["ordner"] for s in folder_specs(ordner, {}) if s["athlet"] == k.Athlet)
+            specs.append(spec)
+        fortschritt = st.progress(0.0)
+        # Ein Athlet pro Worker-Prozess, alle Kerne
+        st.session_state["team"] = squad_profiles(specs, progress=lambda done, total: fortschritt.progress(done / total))
+        fortschritt.empty()
+
+    if "team" in st.session_state:
+        numerisch = [c for c in COLUMNS if c not in ("Athlet", "Typ", "Fehler")]
+        sortierung = st.selectbox("Rangliste nach", numerisch, index=numerisch.index("CP (W/kg)"))
+        tabelle = pd.DataFrame(rank(st.session_state["team"], by=sortierung), columns=["Rang"] + COLUMNS)
+        st.dataframe(tabelle.round(2), hide_index=True, use_container_width=True)
+        st.download_button("⬇️ Rangliste (CSV)", tabelle.to_csv(index=False).encode("utf-8"), "team_rangliste.csv", "text/csv")
+
+startup_timing.show(st, "squad_dashboard")
@@ -0,0 +1,190 @@
+"""Profiling der Verarbeitungsstufen (Wandzeit, CPU-Zeit, Speicher) je Stufe und Datei.
+
+In der App::
+
+    prof = StageProfiler("app_fixed", enabled=debug)
+    try:
+        with prof.stage("CP-Fit"):
+            ...
+        with prof.stage("W′bal", datei):
+            ...
+    finally:
+        prof.show(st)      # Debug-Expander
+        prof.finish()      # JSON-Zeilen nach POWERPROFILE_PROFILE_LOG
+
+Auswertung gesammelter Logs (Perzentile je Stufe)::
+
+    python stage_profiler.py /var/log/powerprofile/profile.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+PROFILE_LOG = os.environ.get("POWERPROFILE_PROFILE_LOG")
+
+_write_lock = threading.Lock()
+# tracemalloc ist prozessglobal: Messungen laufen unter dieser Sperre, Tracing nur währenddessen
+_trace_lock = threading.RLock()
+_trace_stack = []
+
+
+def current_rss_mb():
+    # Aktueller residenter Speicher dieses Prozesses (Linux, /proc); sonst None
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+@contextmanager
+def traced_peak(enabled=True):
+    """Peak der Python-Allokationen (MB) im Block, als ``out["peak_mb"]``.
+
+    tracemalloc läuft nur, solange ein solcher Block aktiv ist, und alle
+    Blöcke des Prozesses sind gegenseitig gesperrt – parallele Sitzungen
+    warten also, statt sich Peaks zu verfälschen. Gedacht für den Debug-Modus
+    und für Worker-Prozesse; verschachtelte Blöcke im selben Thread sind erlaubt.
+    """
+    out = {"peak_mb": None}
+    if not enabled:
+        yield out
+        return
+    with _trace_lock:
+        if not _trace_stack:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+        else:
+            started = False
+            # bisherigen Peak der äußeren Messung gutschreiben, bevor er zurückgesetzt wird
+            outer = _trace_stack[-1]
+            outer["peak"] = max(outer["peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        frame = {"base": tracemalloc.get_traced_memory()[0], "peak": 0}
+        _trace_stack.append(frame)
+        try:
+            yield out
+        finally:
+            frame["peak"] = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+            _trace_stack.pop()
+            out["peak_mb"] = max(frame["peak"] - frame["base"], 0) / 1e6
+            if _trace_stack:
+                _trace_stack[-1]["peak"] = max(_trace_stack[-1]["peak"], frame["peak"])
+            elif started:
+                tracemalloc.stop()
+
+
+class StageProfiler:
+    """Sammelt Messungen eines Durchlaufs (eine Sitzung/ein Rerun).
+
+    ``enabled=False`` und kein ``PROFILE_LOG``: ``stage`` misst nichts (kein Overhead).
+    Je Stufe wird die Änderung des aktuellen RSS erfasst (prozessweit, günstig).
+    Den Peak der Allokationen misst ``traced_peak`` nur mit ``memory=True``
+    (Standard: im Debug-Modus), da tracemalloc bremst und Stufen mit
+    Speichermessung prozessweit nacheinander laufen.
+    """
+
+    def __init__(self, app, enabled=False, memory=None, log_path=PROFILE_LOG):
+        self.app = app
+        self.log_path = log_path
+        self.enabled = bool(enabled or log_path)
+        self.memory = bool(enabled) if memory is None else memory
+        self.session = uuid.uuid4().hex[:12]
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, file=None):
+        if not self.enabled:
+            yield
+            return
+        mem = {"peak_mb": None}
+        rss0 = current_rss_mb()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            with traced_peak(self.memory) as mem:
+                yield
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            rss = None if rss0 is None else current_rss_mb() - rss0
+            self.add(name, file, wall * 1000, cpu * 1000, mem["peak_mb"], rss)
+
+    def add(self, name, file=None, wall_ms=0.0, cpu_ms=0.0, peak_mb=None, rss_mb=None):
+        # Messung von außen übernehmen (z. B. aus einem Worker-Prozess, dort mit ``traced_peak`` gemessen)
+        if not self.enabled:
+            return
+        self.records.append({
+            "app": self.app, "session": self.session, "ts": time.time(), "stage": name, "file": file,
+            "wall_ms": round(wall_ms, 3), "cpu_ms": round(cpu_ms, 3),
+            "peak_mb": None if peak_mb is None else round(peak_mb, 3),
+            "rss_mb": None if rss_mb is None else round(rss_mb, 3),
+        })
+
+    def summary(self):
+        """Zeilen je Stufe: Anzahl, Summe und Maximum der Wandzeit, CPU-Zeit, Peak-Speicher, RSS-Änderung."""
+        rows = {}
+        for r in self.records:
+            row = rows.setdefault(r["stage"], {"Stufe": r["stage"], "Anzahl": 0, "Wand (ms)": 0.0, "CPU (ms)": 0.0,
+                                               "max. Wand (ms)": 0.0, "Peak (MB)": None, "RSS-Δ (MB)": None})
+            row["Anzahl"] += 1
+            row["Wand (ms)"] += r["wall_ms"]
+            row["CPU (ms)"] += r["cpu_ms"]
+            row["max. Wand (ms)"] = max(row["max. Wand (ms)"], r["wall_ms"])
+            if r["peak_mb"] is not None:
+                row["Peak (MB)"] = max(row["Peak (MB)"] or 0.0, r["peak_mb"])
+            if r.get("rss_mb") is not None:
+                row["RSS-Δ (MB)"] = (row["RSS-Δ (MB)"] or 0.0) + r["rss_mb"]
+        return list(rows.values())
+
+    def show(self, st):
+        if not self.records:
+            return
+        with st.expander("🐞 Profiling je Stufe"):
+            st.dataframe(self.summary())
+            st.dataframe([{k: r[k] for k in ("stage", "file", "wall_ms", "cpu_ms", "peak_mb", "rss_mb")} for r in self.records])
+
+    def finish(self):
+        """Schreibt alle Messungen als JSON-Zeilen (auch nach Fehlern aufrufen, z. B. in ``finally``)."""
+        if self.log_path and self.records:
+            lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.records)
+            with _write_lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        self.records = []
+
+
+def percentiles(path, quantiles=(50, 90, 99)):
+    """Perzentile der Wandzeit je Stufe über alle Sitzungen einer JSON-Lines-Datei."""
+    walls = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                r = json.loads(line)
+            except ValueError:
+                continue
+            walls.setdefault(r["stage"], []).append(r["wall_ms"])
+    return {
+        stage: {"n": len(v), **{f"p{q}": float(p) for q, p in zip(quantiles, np.percentile(v, quantiles))}}
+        for stage, v in walls.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latenz-Perzentile je Stufe aus Profiling-Logs")
+    parser.add_argument("log", help="JSON-Lines-Datei (POWERPROFILE_PROFILE_LOG)")
+    args = parser.parse_args(argv)
+    for stage, p in sorted(percentiles(args.log).items()):
+        print(f"{stage:30s} n={p['n']:6d}  " + "  ".join(f"{k}={v:9.1f} ms" for k, v in p.items() if k != "n"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Import- und Startzeiten der Streamlit-Apps messen.
+
+Schwere Abhängigkeiten (sklearn, fpdf, joblib, fitparse) werden über
+``lazy_import`` erst geladen, wenn die Funktion gebraucht wird; die Ladezeit
+wird dabei protokolliert. ``mark`` hält die Zeit seit dem ersten Import
+dieses Moduls fest (z. B. nach den Imports einer App), ``phase`` misst einen
+Block, ``finish`` schließt den ersten Durchlauf eines Prozesses
+ab (Kaltstart). ``show`` zeigt alles in einem Expander.
+
+Mit ``POWERPROFILE_STARTUP_LOG=/pfad/startup.jsonl`` wird jeder Kaltstart
+als JSON-Zeile angehängt, um die Startzeit je App über Zeit zu verfolgen.
+"""
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+STARTUP_LOG = os.environ.get("POWERPROFILE_STARTUP_LOG")
+
+_T0 = time.perf_counter()
+_lock = threading.Lock()
+_records = []  # {"Schritt", "ms", "Module"}
+_finished = set()
+_marked = set()
+
+
+def _record(label, seconds, modules=0):
+    with _lock:
+        _records.append({"Schritt": label, "ms": round(seconds * 1000, 1), "Module": modules})
+
+
+@contextmanager
+def phase(label):
+    """Misst die Dauer eines Blocks und wie viele Module darin neu geladen wurden."""
+    before = len(sys.modules)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(label, time.perf_counter() - t0, len(sys.modules) - before)
+
+
+def mark(label):
+    """Zeit seit dem Start bis hierher, z. B. direkt nach den Imports einer App.
+
+    Nur der erste Aufruf je ``label`` zählt (Kaltstart); Streamlit-Reruns werden ignoriert.
+    """
+    with _lock:
+        if label in _marked:
+            return
+        _marked.add(label)
+    _record(label, time.perf_counter() - _T0, len(sys.modules))
+
+
+def lazy_import(name):
+    """``importlib.import_module`` mit Zeitmessung beim ersten Laden im Prozess."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with phase(f"import {name}"):
+        return importlib.import_module(name)
+
+
+def finish(app):
+    """Markiert das Ende des ersten Durchlaufs von ``app`` in diesem Prozess (einmalig)."""
+    with _lock:
+        if app in _finished:
+            return
+        _finished.add(app)
+        total = time.perf_counter() - _T0
+        _records.append({"Schritt": f"{app}: erster Durchlauf", "ms": round(total * 1000, 1), "Module": len(sys.modules)})
+        records = list(_records)
+    if STARTUP_LOG:
+        line = {"app": app, "zeit": time.time(), "gesamt_ms": round(total * 1000, 1), "schritte": records}
+        with open(STARTUP_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+def report():
+    with _lock:
+        return list(_records)
+
+
+def show(st, app):
+    # Expander mit allen Messungen dieses Prozesses; ruft vorher ``finish`` auf
+    finish(app)
+    with st.expander("⏱️ Startzeit & Imports"):
+        st.dataframe(report())
@@ -1,36 +1,53 @@
+import argparse
 
 import pandas as pd
-import numpy as np
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import r2_score, mean_absolute_error
-import joblib
-
-# Lade Beispieldaten
-df = pd.read_csv("vo2_training_data.csv")  # Diese Datei musst du vorbereiten
-
-# Feature Engineering
-df["FFM"] = df["Gewicht"] * (1 - df["Körperfett"] / 100)
-
-features = [
-    "MMP_1s", "MMP_20s", "MMP_1min", "MMP_2min", "MMP_3min", "MMP_5min", "MMP_10min", "MMP_20min", "FFM", "VLamax"
-]
-
-X = df[features]
-y = df["VO2max"]
-
-# Train/Test-Split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# ML-Modell: Random Forest
-modell = RandomForestRegressor(n_estimators=200, random_state=42)
-modell.fit(X_train, y_train)
-
-# Evaluation
-y_pred = modell.predict(X_test)
-print("R²:", r2_score(y_test, y_pred))
-print("MAE:", mean_absolute_error(y_test, y_pred))
-
-# Speichern
-joblib.dump(modell, "vo2_model.joblib")
-print("✅ Modell gespeichert als vo2_model.joblib")
+from training_store import get_training_store
+from model_registry import get_registry
+from vo2_cv import cross_validate, DEFAULT_FOLDS, FEATURE_SETS
+from vo2_training import FEATURES, TARGET, N_ESTIMATORS, add_features
+
+parser = argparse.ArgumentParser(description="VO₂max-Modell aus den Trainingsdaten trainieren")
+parser.add_argument("--cv", action="store_true",
+                    help="Hyperparametersuche per k-fach-Kreuzvalidierung; beste Konfiguration wird trainiert")
+parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+parser.add_argument("--workers", type=int, default=None, help="Prozesse (Standard: POWERPROFILE_WORKERS bzw. alle Kerne)")
+args = parser.parse_args()
+
+# Trainingsdaten aus dem SQLite-Speicher der Trainer-App (übernimmt eine vorhandene CSV einmalig)
+df = add_features(get_training_store().frame())
+
+X = df[FEATURES]
+y = df[TARGET]
+params = {"n_estimators": N_ESTIMATORS, "max_depth": None}
+
+if args.cv:
+    # Alle Konfigurationen × Folds parallel; Tabelle nach MAE sortiert
+    table = cross_validate(df, k=args.folds, max_workers=args.workers)
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    # Das ausgelieferte Modell nutzt alle Features (Batch-Schätzung und Registry erwarten FEATURES)
+    best = table[table["features"] == "alle"].iloc[0]
+    params = {"n_estimators": int(best["n_estimators"]),
+              "max_depth": None if pd.isna(best["max_depth"]) else int(best["max_depth"])}
+    if table.iloc[0]["features"] != "alle":
+        print(f"Hinweis: Feature-Teilmenge '{table.iloc[0]['features']}' ({FEATURE_SETS[table.iloc[0]['features']]}) "
+              f"hat die niedrigste MAE")
+    print("Beste Konfiguration:", params)
+else:
+    # Bewertung per k-fach-Kreuzvalidierung statt eines einzelnen Train/Test-Splits
+    cv = cross_validate(df, [{**params, "features": "alle"}], k=args.folds, max_workers=args.workers).iloc[0]
+    print("R² (CV):", cv["R²"])
+    print("MAE (CV):", cv["MAE"])
+
+# Finales Modell auf allen Daten
+modell = RandomForestRegressor(random_state=42, n_jobs=-1, **params)
+modell.fit(X, y)
+y_pred = modell.predict(X)
+print("R² (Training):", r2_score(y, y_pred))
+print("MAE (Training):", mean_absolute_error(y, y_pred))
+
+# Speichern (atomar, laufende Apps laden das neue Modell beim nächsten Zugriff)
+registry = get_registry()
+registry.save("vo2max", modell)
+print(f"✅ Modell gespeichert als {registry.path('vo2max')}")
@@ -0,0 +1,164 @@
+"""Trainingsdaten des VO₂max-Modells in SQLite statt in einer CSV.
+
+Jede neue Messung ist ein einzelnes ``INSERT`` in einer Transaktion (WAL-Modus,
+mehrere Nutzer gleichzeitig), unabhängig von der Anzahl vorhandener Zeilen.
+Indizes auf Athlet/Datum erlauben Abfragen je Athlet oder Zeitraum; für das
+Training werden nur die benötigten Spalten gelesen und der letzte Stand wird
+bis zur nächsten Änderung im Prozess gehalten.
+
+Eine vorhandene ``vo2_training_data.csv`` wird beim ersten Öffnen einmalig
+übernommen.
+"""
+import datetime as dt
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DB_PATH = os.environ.get("POWERPROFILE_TRAINING_DB", "vo2_training.sqlite")
+LEGACY_CSV = "vo2_training_data.csv"
+
+# Messwerte in Spaltenreihenfolge der bisherigen CSV
+VALUE_COLUMNS = [
+    "Gewicht", "Körperfett", "VLamax", "MMP_1s", "MMP_20s", "MMP_1min", "MMP_2min",
+    "MMP_3min", "MMP_5min", "MMP_10min", "MMP_20min", "VO2max",
+]
+
+
+def _q(name):
+    # Spaltennamen quoten (Umlaute wie in "Körperfett")
+    return f'"{name}"'
+
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS messungen (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    athlet TEXT NOT NULL DEFAULT '',
+    datum TEXT NOT NULL,
+    erfasst REAL NOT NULL,
+    {", ".join(f"{_q(c)} REAL" for c in VALUE_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS idx_messungen_athlet_datum ON messungen (athlet, datum);
+CREATE INDEX IF NOT EXISTS idx_messungen_datum ON messungen (datum);
+"""
+
+
+class TrainingStore:
+    def __init__(self, path=DEFAULT_DB_PATH, legacy_csv=LEGACY_CSV):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._frame = None  # (revision, spalten, DataFrame)
+        with self._conn() as con:
+            con.executescript(_SCHEMA)
+        if legacy_csv and os.path.exists(legacy_csv):
+            self._import_legacy(legacy_csv)
+
+    def _import_legacy(self, legacy_csv):
+        # Prüfen und Importieren in einer Schreibtransaktion: startet ein zweiter Prozess
+        # gleichzeitig, wartet er auf die Sperre und sieht danach die importierten Zeilen
+        rows = pd.read_csv(legacy_csv).to_dict("records")
+        con = self._conn()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if con.execute("SELECT COUNT(*) FROM messungen").fetchone()[0] == 0:
+                self._insert(con, rows)
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+
+    def _conn(self):
+        # Eine Verbindung pro Thread (sqlite3-Verbindungen sind nicht threadsicher)
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM messungen").fetchone()[0]
+
+    def append(self, values, athlet="", datum=None):
+        """Fügt eine Messung an (ein INSERT, eigene Transaktion); gibt die neue ``id`` zurück."""
+        return self.append_many([{**values, "athlet": athlet, "datum": datum}])[-1]
+
+    def append_many(self, rows):
+        # Mehrere Messungen in einer Transaktion (z. B. CSV-Import)
+        con = self._conn()
+        with con:
+            return self._insert(con, rows)
+
+    @staticmethod
+    def _insert(con, rows):
+        datum_default = dt.date.today().isoformat()
+        cols = ["athlet", "datum", "erfasst"] + VALUE_COLUMNS
+        sql = f"INSERT INTO messungen ({', '.join(map(_q, cols))}) VALUES ({', '.join('?' * len(cols))})"
+        now = time.time()
+        params = [
+            [str(r.get("athlet") or ""), str(r.get("datum") or datum_default), now]
+            + [None if pd.isna(r.get(c)) else float(r[c]) for c in VALUE_COLUMNS]
+            for r in rows
+        ]
+        return [con.execute(sql, p).lastrowid for p in params]
+
+    def revision(self):
+        """Günstiger Änderungsstand: höchste ``id`` (append-only, per Primärschlüssel-Index)."""
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM messungen").fetchone()[0]
+
+    def frame(self, columns=None, athlet=None, since=None, until=None):
+        """Messungen als DataFrame; nur ``columns`` (Standard: alle Messwerte) werden gelesen.
+
+        Ohne Filter wird das Ergebnis bis zur nächsten Änderung im Prozess gehalten;
+        zurückgegeben wird immer eine Kopie, damit Aufrufer (z. B. ``df["FFM"] = …``)
+        den gemeinsamen Stand nicht verändern.
+        """
+        columns = list(columns or ["athlet", "datum"] + VALUE_COLUMNS)
+        where, params = [], []
+        if athlet is not None:
+            where.append("athlet = ?")
+            params.append(athlet)
+        if since is not None:
+            where.append("datum >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            where.append("datum <= ?")
+            params.append(until.isoformat())
+        cacheable = not where
+        if cacheable:
+            rev = self.revision()
+            with self._lock:
+                if self._frame is not None and self._frame[0] == rev and self._frame[1] == columns:
+                    return self._frame[2].copy()
+        sql = f"SELECT {', '.join(map(_q, columns))} FROM messungen"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self._conn().execute(sql + " ORDER BY id", params).fetchall()
+        df = pd.DataFrame(rows, columns=columns)
+        for c in columns:
+            if c in VALUE_COLUMNS:
+                df[c] = df[c].astype(np.float64)
+        if cacheable:
+            with self._lock:
+                self._frame = (rev, columns, df)
+            return df.copy()
+        return df
+
+    def athletes(self):
+        return [r[0] for r in self._conn().execute("SELECT DISTINCT athlet FROM messungen ORDER BY athlet")]
+
+
+_default_store = None
+
+
+def get_training_store():
+    # Prozessweit, wie activity_cache.get_cache
+    global _default_store
+    if _default_store is None:
+        _default_store = TrainingStore()
+    return _default_store
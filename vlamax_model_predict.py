@@ -1,17 +1,10 @@
-
-import joblib
 import numpy as np
-import os
 
-# Lade das Modell beim ersten Import
-model_path = "vlamax_model.joblib"
-if os.path.exists(model_path):
-    modell = joblib.load(model_path)
-else:
-    modell = None
+from model_registry import get_registry
+
+# Das Modell wird erst bei der ersten Vorhersage geladen (und bei Änderung der Datei neu)
+
 
 def vlamax_prediction(ffm, dauer, watt_avg, watt_peak, geschlecht_code):
-    if modell is None:
-        raise ValueError("❌ VLamax-Modell nicht gefunden. Bitte 'vlamax_model.joblib' bereitstellen.")
     features = np.array([[ffm, dauer, watt_avg, watt_peak, geschlecht_code]])
-    return modell.predict(features)[0]
+    return get_registry().predict("vlamax", features)[0]
@@ -0,0 +1,136 @@
+"""k-fach-Kreuzvalidierung und Hyperparametersuche für das VO₂max-Modell.
+
+Alle (Konfiguration × Fold)-Jobs laufen in einem Prozess-Pool; die Daten
+gehen einmal pro Worker über den Initializer statt mit jedem Job. Die
+Fold-Aufteilung hängt nur von (N, k, Seed) ab und wird gecacht. Neben MAE
+und R² werden Fit-Zeit und Vorhersage-Latenz berichtet, um ein Modell zu
+wählen, das genau *und* schnell genug zum Ausliefern ist.
+
+    python train_vo2max_model.py --cv
+"""
+import itertools
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from parallel_ingest import DEFAULT_WORKERS
+from startup_timing import lazy_import
+from vo2_training import FEATURES, TARGET, add_features
+
+DEFAULT_FOLDS = 5
+
+# Suchraum: Waldgröße, Tiefe und Feature-Teilmengen
+PARAM_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [None, 8, 16],
+}
+FEATURE_SETS = {
+    "alle": FEATURES,
+    "MMP + FFM": [f for f in FEATURES if f != "VLamax"],
+    "kurz + FFM + VLamax": ["MMP_1s", "MMP_20s", "MMP_1min", "MMP_5min", "FFM", "VLamax"],
+}
+
+
+@lru_cache(maxsize=32)
+def fold_splits(n, k=DEFAULT_FOLDS, seed=42):
+    """k Folds als Tupel ``(train_idx, test_idx)``; gleiche (N, k, Seed) ergeben dieselben Arrays."""
+    order = np.random.default_rng(seed).permutation(n)
+    folds = np.array_split(order, k)
+    return tuple(
+        (np.sort(np.concatenate(folds[:i] + folds[i + 1:])), np.sort(folds[i]))
+        for i in range(k)
+    )
+
+
+def param_grid(grid=PARAM_GRID, feature_sets=FEATURE_SETS):
+    # Alle Kombinationen als Liste von Dicts (inkl. Name der Feature-Teilmenge)
+    keys = list(grid)
+    return [
+        {**dict(zip(keys, values)), "features": name}
+        for values in itertools.product(*(grid[k] for k in keys))
+        for name in feature_sets
+    ]
+
+
+_X = _y = None
+
+
+def _init_worker(X, y):
+    global _X, _y
+    _X, _y = X, y
+
+
+def _fit_fold(job):
+    # Ein Fold einer Konfiguration; läuft im Worker-Prozess (n_jobs=1, parallel wird über Jobs)
+    config, cols, train, test = job
+    ensemble = lazy_import("sklearn.ensemble")
+    params = {k: v for k, v in config.items() if k != "features"}
+    model = ensemble.RandomForestRegressor(random_state=42, n_jobs=1, **params)
+    X_train, X_test = _X[np.ix_(train, cols)], _X[np.ix_(test, cols)]
+    t0 = time.perf_counter()
+    model.fit(X_train, _y[train])
+    fit_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    pred = model.predict(X_test)
+    predict_s = time.perf_counter() - t0
+    # Einzel-Vorhersage wie in der App (ein Athlet), für die Auslieferungs-Latenz
+    t0 = time.perf_counter()
+    model.predict(X_test[:1])
+    single_ms = (time.perf_counter() - t0) * 1000
+    err = pred - _y[test]
+    return {"sse": float(err @ err), "sae": float(np.abs(err).sum()), "y": _y[test], "n": len(test),
+            "fit_s": fit_s, "predict_s": predict_s, "single_ms": single_ms}
+
+
+def cross_validate(df, configs=None, k=DEFAULT_FOLDS, seed=42, max_workers=None, feature_sets=FEATURE_SETS,
+                   start_method=None):
+    """Kreuzvalidiert alle ``configs`` (Standard: ``param_grid()``) auf ``df`` parallel.
+
+    ``start_method``: z. B. ``"spawn"`` aus einem Streamlit-Server heraus, wo ein
+    ``fork`` aus dem Prozess mit vielen Threads an fremden Locks hängen kann.
+
+    ``df``: Trainingsdaten wie im Trainingsspeicher (FFM wird ergänzt).
+    Rückgabe: DataFrame je Konfiguration mit MAE/R² (über alle Folds),
+    Fit-Zeit (s, Mittel je Fold) und Vorhersage-Latenz (µs je Zeile bei
+    Batch-Vorhersage, ms für eine Einzel-Vorhersage), sortiert nach MAE.
+    """
+    df = add_features(df)
+    configs = configs or param_grid(feature_sets=feature_sets)
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    y = df[TARGET].to_numpy(dtype=np.float64)
+    k = min(k, len(df))
+    if k < 2:
+        raise ValueError("Für eine Kreuzvalidierung werden mindestens 2 Datensätze benötigt")
+    splits = fold_splits(len(df), k, seed)
+    col_idx = {name: [FEATURES.index(f) for f in cols] for name, cols in feature_sets.items()}
+    jobs = [(c, col_idx[c["features"]], train, test) for c in configs for train, test in splits]
+
+    max_workers = min(max_workers or DEFAULT_WORKERS, len(jobs))
+    if max_workers <= 1:
+        _init_worker(X, y)
+        results = [_fit_fold(j) for j in jobs]
+    else:
+        ctx = multiprocessing.get_context(start_method)
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx, initializer=_init_worker, initargs=(X, y)) as pool:
+            results = list(pool.map(_fit_fold, jobs, chunksize=max(1, len(jobs) // (4 * max_workers))))
+
+    rows = []
+    for i, config in enumerate(configs):
+        folds = results[i * k:(i + 1) * k]
+        n = sum(f["n"] for f in folds)
+        sse = sum(f["sse"] for f in folds)
+        y_all = np.concatenate([f["y"] for f in folds])
+        sst = float(((y_all - y_all.mean()) ** 2).sum())
+        rows.append({
+            **config,
+            "MAE": sum(f["sae"] for f in folds) / n,
+            "R²": 1 - sse / sst if sst > 0 else np.nan,
+            "Fit (s)": float(np.mean([f["fit_s"] for f in folds])),
+            "Vorhersage (µs/Zeile)": sum(f["predict_s"] for f in folds) / n * 1e6,
+            "Einzel (ms)": float(np.median([f["single_ms"] for f in folds])),
+        })
+    return pd.DataFrame(rows).sort_values("MAE", kind="stable").reset_index(drop=True)
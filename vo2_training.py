@@ -0,0 +1,184 @@
+"""Training des VO₂max-Modells im Hintergrund, nur wenn sich die Trainingsdaten ändern.
+
+Der Fingerabdruck (SHA-256 über Features + Zielwert) des zuletzt trainierten
+Datensatzes liegt neben dem Modell (``vo2_model.joblib.json``). Solange er
+zur CSV passt, wird nicht trainiert; sonst trainiert ein Hintergrund-Thread
+(``n_jobs=-1``, alle Kerne) und die App sagt bis dahin mit dem letzten Modell
+aus dem ``model_registry`` voraus.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model_registry import get_registry
+from startup_timing import lazy_import
+
+FEATURES = ["MMP_1s", "MMP_20s", "MMP_1min", "MMP_2min", "MMP_3min", "MMP_5min", "MMP_10min", "MMP_20min", "FFM", "VLamax"]
+TARGET = "VO2max"
+
+N_ESTIMATORS = 200
+DEFAULT_PARAMS = {"n_estimators": N_ESTIMATORS, "max_depth": None}
+# Bäume pro Trainingsschritt (warm_start); bestimmt die Feinheit der Fortschrittsanzeige
+TREES_PER_STEP = 25
+
+
+def add_features(df):
+    # Abgeleitete Features wie in train_vo2max_model.py
+    df = df.copy()
+    df["FFM"] = df["Gewicht"] * (1 - df["Körperfett"] / 100)
+    return df
+
+
+def fingerprint(df):
+    """SHA-256 über die Trainingsspalten (Reihenfolge der Zeilen zählt)."""
+    data = df[FEATURES + [TARGET]].astype(np.float64)
+    h = hashlib.sha256(",".join(data.columns).encode())
+    h.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+class BackgroundTrainer:
+    """Ein Trainingsjob zur Zeit; ``ensure`` startet ihn nur bei neuem Fingerabdruck."""
+
+    def __init__(self, registry=None, name="vo2max", params=None):
+        self.registry = registry or get_registry()
+        self.name = name
+        # Ohne Vorgabe die Parameter des zuletzt gespeicherten Modells (übernommene Suche bleibt nach Neustart)
+        self.params = dict(params or self.metrics().get("params") or DEFAULT_PARAMS)
+        # Kreuzvalidierte Güte der übernommenen Konfiguration (``{"params", "mae", "r2", "folds", "rows"}``)
+        self._cv = self.metrics().get("cv")
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vo2-train")
+        self._status = {"state": "idle", "progress": 0.0, "fingerprint": None, "error": None}
+
+    def _meta_path(self):
+        return self.registry.path(self.name) + ".json"
+
+    def trained_fingerprint(self):
+        # Fingerabdruck des gespeicherten Modells (über Prozessneustarts hinweg)
+        try:
+            with open(self._meta_path(), encoding="utf-8") as f:
+                return json.load(f).get("fingerprint")
+        except (OSError, ValueError):
+            return None
+
+    def metrics(self):
+        try:
+            with open(self._meta_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def status(self):
+        with self._lock:
+            return dict(self._status)
+
+    def set_params(self, cv=None, **params):
+        """Hyperparameter übernehmen (z. B. aus vo2_cv); wirkt beim nächsten ``ensure``.
+
+        ``cv``: kreuzvalidierte Güte dieser Konfiguration (``{"mae", "r2", "folds", "rows"}``);
+        sie wird in die Modell-Metadaten übernommen, sobald ein Modell mit diesen
+        Parametern gespeichert ist (sofort, wenn das schon der Fall ist).
+        """
+        with self._lock:
+            self.params = {**self.params, **params}
+            if cv is not None:
+                self._cv = {**cv, "params": dict(self.params)}
+            cv_entry = self._cv
+        meta = self.metrics()
+        if cv is not None and meta.get("params") == cv_entry["params"]:
+            self._write_meta({**meta, "cv": cv_entry})
+
+    def _write_meta(self, meta):
+        tmp = f"{self._meta_path()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path())
+
+    def ensure(self, df):
+        """Startet das Training, falls ``df`` oder die Hyperparameter sich vom letzten Training unterscheiden.
+
+        Gibt ``True`` zurück, wenn ein Training läuft oder gestartet wurde.
+        """
+        df = add_features(df)
+        with self._lock:
+            params = dict(self.params)
+        fp = fingerprint(df) + ":" + ",".join(f"{k}={params[k]}" for k in sorted(params))
+        with self._lock:
+            if self._status["state"] == "running":
+                if self._status["fingerprint"] == fp:
+                    return True
+                # Daten haben sich während des Trainings geändert: danach erneut prüfen
+                self._status["pending"] = df
+                return True
+            if fp == self.trained_fingerprint() and self.registry.get(self.name) is not None:
+                return False
+            if self._status["state"] == "error" and self._status["fingerprint"] == fp:
+                # Gleiche Daten sind schon einmal fehlgeschlagen: nicht bei jedem Rerun erneut versuchen
+                return False
+            self._status = {"state": "running", "progress": 0.0, "fingerprint": fp, "error": None}
+        self._pool.submit(self._train, df, fp, params)
+        return True
+
+    def _train(self, df, fp, params):
+        t0 = time.perf_counter()
+        try:
+            # Importfehler sollen den Status auf "error" setzen statt ihn auf "running" zu lassen
+            RandomForestRegressor = lazy_import("sklearn.ensemble").RandomForestRegressor
+            metrics = lazy_import("sklearn.metrics")
+            mean_absolute_error, r2_score = metrics.mean_absolute_error, metrics.r2_score
+            X, y = df[FEATURES], df[TARGET]
+            n_trees = params["n_estimators"]
+            modell = RandomForestRegressor(n_estimators=0, max_depth=params["max_depth"], random_state=42, n_jobs=-1, warm_start=True)
+            for n in range(TREES_PER_STEP, n_trees + TREES_PER_STEP, TREES_PER_STEP):
+                modell.n_estimators = min(n, n_trees)
+                modell.fit(X, y)
+                with self._lock:
+                    self._status["progress"] = modell.n_estimators / n_trees
+            train_s = time.perf_counter() - t0
+            # Güte auf den Trainingsdaten (optimistisch); kreuzvalidierte Werte kommen aus der
+            # übernommenen Suche (vo2_cv, Button/CLI), nicht aus einem Lauf bei jeder Datenänderung
+            y_pred = modell.predict(X)
+            r2 = float(r2_score(y, y_pred)) if len(df) > 1 else float("nan")
+            mae, bewertung = float(mean_absolute_error(y, y_pred)), "Trainingsdaten"
+            with self._lock:
+                cv = self._cv if self._cv and self._cv.get("params") == params else None
+            meta = {
+                "fingerprint": fp,
+                "params": params,
+                "rows": len(df),
+                "r2": r2,
+                "mae": mae,
+                "bewertung": bewertung,
+                "cv": cv,
+                "train_s": train_s,
+                "trained_at": time.time(),
+            }
+            self.registry.save(self.name, modell)
+            self._write_meta(meta)
+            with self._lock:
+                pending = self._status.pop("pending", None)
+                self._status.update(state="done", progress=1.0)
+        except Exception as e:
+            with self._lock:
+                pending = self._status.pop("pending", None)
+                self._status.update(state="error", error=str(e))
+        if pending is not None:
+            self.ensure(pending)
+
+
+_default_trainer = None
+
+
+def get_trainer():
+    # Prozessweit, damit der Job Streamlit-Reruns überlebt
+    global _default_trainer
+    if _default_trainer is None:
+        _default_trainer = BackgroundTrainer()
+    return _default_trainer
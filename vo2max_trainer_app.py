@@ -1,31 +1,27 @@
 
+import startup_timing
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import r2_score, mean_absolute_error
-import joblib
-import os
+from model_registry import get_registry
+from vo2_training import get_trainer
+from batch_predict import vo2max_model_batch
+from training_store import get_training_store
+startup_timing.mark("Imports")
 
 st.set_page_config(page_title="Trainierbares VO₂max-Modell", layout="wide")
 st.title("🧠 VO₂max-ML-Modell: Training & Anwendung")
 
-MODEL_PATH = "vo2_model.joblib"
-DATA_PATH = "vo2_training_data.csv"
-
-# Daten anzeigen oder hochladen
-if os.path.exists(DATA_PATH):
-    df = pd.read_csv(DATA_PATH)
-    st.subheader("📊 Aktuelle Trainingsdatenbank")
-    st.dataframe(df)
-else:
-    df = pd.DataFrame()
+registry = get_registry()
+# SQLite-Speicher (append-only, indiziert nach Athlet/Datum); eine alte CSV wird einmalig übernommen
+store = get_training_store()
 
 st.subheader("➕ Neue Athleten-Daten hinzufügen")
 with st.form("neuer_athlet"):
     col1, col2, col3 = st.columns(3)
     with col1:
+        athlet = st.text_input("Athlet")
+        datum = st.date_input("Datum der Messung")
         gewicht = st.number_input("Gewicht (kg)", 40.0, 120.0, 70.0)
         fett = st.number_input("Körperfett (%)", 5.0, 40.0, 15.0)
         vlamax = st.number_input("VLamax", 0.2, 1.0, 0.45)
@@ -44,7 +40,7 @@ with st.form("neuer_athlet"):
 
     submitted = st.form_submit_button("Hinzufügen & Trainieren")
     if submitted:
-        neue_daten = pd.DataFrame([{
+        store.append({
             "Gewicht": gewicht,
             "Körperfett": fett,
             "VLamax": vlamax,
@@ -57,27 +53,67 @@ with st.form("neuer_athlet"):
             "MMP_10min": mmp10,
             "MMP_20min": mmp20,
             "VO2max": vo2
-        }])
-        if not df.empty:
-            df = pd.concat([df, neue_daten], ignore_index=True)
-        else:
-            df = neue_daten
-        df.to_csv(DATA_PATH, index=False)
+        }, athlet=athlet, datum=datum.isoformat())
         st.success("✅ Neue Daten gespeichert!")
 
-# Training starten
+# Gelesen wird erst nach einem evtl. neuen Eintrag; unverändert kommt der Stand aus dem Prozess-Cache
+df = store.frame()
+if not df.empty:
+    st.subheader("📊 Aktuelle Trainingsdatenbank")
+    st.dataframe(df)
+
+# Training nur bei geänderten Daten (Fingerabdruck), im Hintergrund über alle Kerne
 if not df.empty:
-    df["FFM"] = df["Gewicht"] * (1 - df["Körperfett"] / 100)
-    X = df[["MMP_1s", "MMP_20s", "MMP_1min", "MMP_2min", "MMP_3min", "MMP_5min", "MMP_10min", "MMP_20min", "FFM", "VLamax"]]
-    y = df["VO2max"]
-
-    modell = RandomForestRegressor(n_estimators=200, random_state=42)
-    modell.fit(X, y)
-    joblib.dump(modell, MODEL_PATH)
-    y_pred = modell.predict(X)
-    st.subheader("📈 Modellgüte (Training)")
-    st.write(f"R²: {r2_score(y, y_pred):.3f}")
-    st.write(f"MAE: {mean_absolute_error(y, y_pred):.2f} ml/kg/min")
+    trainer = get_trainer()
+    trainer.ensure(df)
+    status = trainer.status()
+    if status["state"] == "running":
+        st.progress(status["progress"], text=f"Modell wird trainiert … {status['progress']:.0%}")
+        st.button("🔄 Status aktualisieren")
+    elif status["state"] == "error":
+        st.error(f"Training fehlgeschlagen: {status['error']}")
+
+    meta = trainer.metrics()
+    if meta:
+        cv = meta.get("cv")
+        if cv:
+            st.subheader(f"📈 Modellgüte ({cv['folds']}-fach-Kreuzvalidierung)")
+            st.write(f"R²: {cv['r2']:.3f}")
+            st.write(f"MAE: {cv['mae']:.2f} ml/kg/min")
+            st.caption(f"Kreuzvalidiert auf {cv['rows']} Datensätzen; auf den Trainingsdaten (optimistisch): "
+                       f"R² {meta['r2']:.3f}, MAE {meta['mae']:.2f}")
+        else:
+            st.subheader("📈 Modellgüte auf den Trainingsdaten (optimistisch)")
+            st.write(f"R²: {meta['r2']:.3f}")
+            st.write(f"MAE: {meta['mae']:.2f} ml/kg/min")
+            st.caption("Das Modell hat diese Daten gesehen; eine realistische Güte liefert die Hyperparametersuche unten.")
+        st.caption(f"{meta['rows']} Datensätze, Training {meta['train_s']:.1f} s, Parameter {meta.get('params', {})}")
+
+    with st.expander("🔬 Hyperparametersuche (Kreuzvalidierung)"):
+        from vo2_cv import DEFAULT_FOLDS, cross_validate
+
+        folds = st.number_input("Folds", 2, 10, DEFAULT_FOLDS)
+        if len(df) < 2:
+            st.info("Mindestens 2 Datensätze nötig.")
+        elif st.button("Suche starten"):
+            with st.spinner("Kreuzvalidierung läuft (parallel über alle Kerne) …"):
+                # spawn statt fork: der Streamlit-Server hat viele Threads
+                st.session_state["cv_table"] = cross_validate(df, k=int(folds), start_method="spawn")
+                st.session_state["cv_folds"] = min(int(folds), len(df))
+                st.session_state["cv_rows"] = len(df)
+        table = st.session_state.get("cv_table")
+        folds_used = st.session_state.get("cv_folds", DEFAULT_FOLDS)
+        if table is not None:
+            st.dataframe(table)
+            # Ausgeliefert wird immer mit allen Features; Teilmengen dienen nur dem Vergleich
+            best = table[table["features"] == "alle"].iloc[0]
+            params = {"n_estimators": int(best["n_estimators"]),
+                      "max_depth": None if pd.isna(best["max_depth"]) else int(best["max_depth"])}
+            if st.button(f"Beste Konfiguration übernehmen: {params}"):
+                trainer.set_params(cv={"mae": float(best["MAE"]), "r2": float(best["R²"]), "folds": folds_used,
+                                       "rows": st.session_state.get("cv_rows", len(df))}, **params)
+                trainer.ensure(df)
+                st.success("Modell wird mit den neuen Parametern neu trainiert.")
 
     st.subheader("🎯 Anwendung des trainierten Modells")
     with st.form("anwendung"):
@@ -96,5 +132,26 @@ if not df.empty:
         predict_btn = st.form_submit_button("VO₂max schätzen")
         if predict_btn:
             input_data = np.array(mmp_values + [ffm, vl]).reshape(1, -1)
-            prediction = modell.predict(input_data)[0]
-            st.success(f"💨 Geschätzte VO₂max: {prediction:.1f} ml/min/kg")
+            # Letztes fertig trainiertes Modell, auch während ein neues trainiert wird
+            if registry.get("vo2max") is None:
+                st.warning("Noch kein trainiertes Modell vorhanden – bitte kurz warten.")
+            else:
+                prediction = registry.predict("vo2max", input_data)[0]
+                st.success(f"💨 Geschätzte VO₂max: {prediction:.1f} ml/min/kg")
+
+st.subheader("📦 Batch-Schätzung")
+batch_file = st.file_uploader("CSV mit Athleten (Spalten wie Trainingsdaten, ohne VO2max)", type=["csv"], key="batch")
+if batch_file is not None:
+    athleten = pd.read_csv(batch_file)
+    if registry.get("vo2max") is None:
+        st.warning("Noch kein trainiertes Modell vorhanden – bitte kurz warten.")
+    else:
+        # Ein einziger vektorisierter predict-Aufruf für alle Zeilen
+        athleten["VO2max_ML"] = vo2max_model_batch(athleten, registry)
+        st.dataframe(athleten)
+        st.download_button("⬇️ Ergebnisse (CSV)", athleten.to_csv(index=False).encode("utf-8"), "vo2max_schaetzung.csv", "text/csv")
+
+with st.expander("🧩 Geladene Modelle"):
+    st.dataframe(pd.DataFrame(registry.stats()))
+
+startup_timing.show(st, "vo2max_trainer_app")
@@ -0,0 +1,94 @@
+import numpy as np
+
+# Abstand (in Einheiten von ln) zwischen Blockgrenzen des Scans; hält exp() im float64-Bereich
+_BLOCK_LOG_SPAN = 200.0
+
+# Ein "Match" gilt als verbrannt, wenn oberhalb CP mindestens so viel W' (J) verbraucht wurde
+DEFAULT_MATCH_J = 2000.0
+# Kurze Einbrüche unter CP (s) innerhalb einer Anstrengung zählen nicht als neues Match
+DEFAULT_MATCH_GAP_S = 5
+
+
+def wbal(power, cp, w_prime, dt=1.0):
+    """W′-Balance (J) je Sample nach dem differentiellen Skiba-Modell.
+
+    Oberhalb CP wird W′ linear verbraucht, unterhalb erholt sich der
+    verbrauchte Anteil ``D = W′ - W′bal`` exponentiell mit der Rate
+    ``(CP - P) / W′``:
+
+        D_i = a_i · D_{i-1} + b_i,  a_i = exp(-max(CP - P_i, 0)·dt / W′),  b_i = max(P_i - CP, 0)·dt
+
+    Die lineare Rekursion wird ohne Python-Schleife über die Samples gelöst:
+    mit ``L = cumsum(ln a)`` gilt ``D_i = e^{L_i} · Σ_{j≤i} b_j e^{-L_j}``. Damit
+    ``e^{-L}`` nicht überläuft, wird in wenigen Blöcken gerechnet (einer pro 200
+    Einheiten von ``L``) und ``D`` über die Blockgrenzen übertragen.
+
+    ``power``: 1-Hz-Leistung (W), fehlende Werte als 0 oder NaN.
+    """
+    p = np.nan_to_num(np.asarray(power, dtype=np.float64))
+    n = len(p)
+    if n == 0 or not np.isfinite(cp) or not np.isfinite(w_prime) or w_prime <= 0:
+        return np.full(n, np.nan)
+    b = np.maximum(p - cp, 0.0) * dt
+    log_a = -np.maximum(cp - p, 0.0) * (dt / w_prime)
+    L = np.cumsum(log_a)
+
+    depletion = np.empty(n)
+    # Blockgrenzen dort, wo L um weitere _BLOCK_LOG_SPAN gefallen ist (L ist monoton fallend)
+    bounds = np.searchsorted(-L, np.arange(_BLOCK_LOG_SPAN, -L[-1] + _BLOCK_LOG_SPAN, _BLOCK_LOG_SPAN))
+    start = 0
+    carry = 0.0
+    for end in list(bounds) + [n]:
+        if end <= start:
+            continue
+        rel = L[start:end] - (L[start - 1] if start > 0 else 0.0)
+        decay = np.exp(rel)
+        depletion[start:end] = decay * (carry + np.cumsum(b[start:end] / decay))
+        carry = depletion[end - 1]
+        start = end
+    return w_prime - depletion
+
+
+def find_matches(power, cp, dt=1.0, min_joules=DEFAULT_MATCH_J, max_gap=DEFAULT_MATCH_GAP_S):
+    """Anstrengungen über CP mit mindestens ``min_joules`` W′-Verbrauch.
+
+    Rückgabe: Liste von Dicts ``{"start", "end", "joules"}`` (Sample-Indizes, end exklusiv).
+    """
+    p = np.nan_to_num(np.asarray(power, dtype=np.float64))
+    above = p > cp
+    if not above.any():
+        return []
+    edges = np.diff(np.concatenate(([0], above.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    # Segmente zusammenfassen, deren Lücke kürzer als max_gap ist
+    keep = np.concatenate(([True], starts[1:] - ends[:-1] > max_gap))
+    seg_start = starts[keep]
+    seg_end = ends[np.concatenate((keep[1:], [True]))]
+    work = np.concatenate(([0.0], np.cumsum(np.maximum(p - cp, 0.0) * dt)))
+    joules = work[seg_end] - work[seg_start]
+    return [
+        {"start": int(s), "end": int(e), "joules": float(j)}
+        for s, e, j in zip(seg_start, seg_end, joules) if j >= min_joules
+    ]
+
+
+def wbal_summary(power, cp, w_prime, dt=1.0, min_joules=DEFAULT_MATCH_J):
+    """Kennzahlen einer Fahrt: minimale W′bal (J, Index) und verbrannte Matches."""
+    balance = wbal(power, cp, w_prime, dt)
+    if len(balance) == 0 or not np.isfinite(balance).any():
+        return {"min_wbal": np.nan, "min_at": -1, "matches": [], "n_matches": 0}
+    i = int(np.nanargmin(balance))
+    matches = find_matches(power, cp, dt, min_joules)
+    return {"min_wbal": float(balance[i]), "min_at": i, "matches": matches, "n_matches": len(matches)}
+
+
+def wbal_history(rides, cp, w_prime, dt=1.0, min_joules=DEFAULT_MATCH_J):
+    """``wbal_summary`` für viele Fahrten (Liste von 1-Hz-Leistungsarrays).
+
+    ``cp``/``w_prime`` sind Skalare oder je Fahrt ein Wert (z. B. aus einem
+    fensterweisen ``cp_model.fit_cp2``).
+    """
+    cps = np.broadcast_to(np.asarray(cp, dtype=np.float64), (len(rides),))
+    wps = np.broadcast_to(np.asarray(w_prime, dtype=np.float64), (len(rides),))
+    return [wbal_summary(p, c, w, dt, min_joules) for p, c, w in zip(rides, cps, wps)]
@@ -0,0 +1,75 @@
+import numpy as np
+
+from fit_decoder import RECORD_CHANNELS
+from resample import DEFAULT_MAX_INTERPOLATE_S
+
+# Histogramm-Auflösung: 1 W bzw. 1 bpm pro Bin; der letzte Bin sammelt alles darüber
+POWER_BINS = 2500
+HR_BINS = 256
+
+_BINS = {"power": POWER_BINS, "heart_rate": HR_BINS, "cadence": 256}
+
+
+def histogram(values, t=None, channel="power", bins=None, max_gap=DEFAULT_MAX_INTERPOLATE_S):
+    """Sekunden pro Watt (bzw. bpm) einer Fahrt als kompaktes uint32-Histogramm.
+
+    Jedes Sample zählt mit der Zeit bis zum nächsten Sample (Smart Recording);
+    längere Lücken als ``max_gap`` s gelten wie in ``resample_1hz`` als Pause
+    und zählen nur 1 s. Ohne ``t`` zählt jedes Sample 1 s. Ungültige FIT-Werte
+    und 0 bpm werden ignoriert.
+
+    Aus dem Histogramm lassen sich die Zeiten in beliebigen Zonen ableiten
+    (``time_in_zones``), ohne die Rohdaten erneut zu lesen.
+    """
+    bins = bins or _BINS.get(channel, POWER_BINS)
+    v = np.asarray(values)
+    valid = np.ones(len(v), dtype=bool)
+    if channel in RECORD_CHANNELS:
+        valid = v != RECORD_CHANNELS[channel][3]
+    if channel == "heart_rate":
+        valid &= v > 0
+    if t is None:
+        weights = None
+    else:
+        t = np.asarray(t, dtype=np.int64)
+        # Dauer eines Samples = Abstand zum nächsten, das letzte zählt 1 s
+        gap = np.diff(t, append=t[-1] + 1) if len(t) else t
+        weights = np.where(gap <= max_gap, gap, 1)[valid]
+    idx = np.minimum(v[valid].astype(np.int64), bins - 1)
+    return np.bincount(idx, weights=weights, minlength=bins).astype(np.uint32)
+
+
+def ride_histograms(activity):
+    # Leistungs- und HF-Histogramm einer ``activity.Activity``
+    return {
+        "power": histogram(activity.power, activity.t, "power"),
+        "heart_rate": histogram(activity.heart_rate, activity.t, "heart_rate"),
+    }
+
+
+def zone_edges(zones):
+    """Untere Bin-Grenzen aus einem Zonen-Dict ``{name: (von, bis)}`` (z. B. ``power_zones``).
+
+    Eine Zone reicht bis zur Untergrenze der nächsten, die letzte ist nach oben offen.
+    """
+    return np.ceil([low for low, _ in zones.values()]).astype(np.int64)
+
+
+def time_in_zones(hist, zones):
+    """Sekunden pro Zone aus einem oder vielen Histogrammen.
+
+    ``hist``: Form ``(..., bins)``, z. B. ``(fahrten, bins)``; die Zonen können
+    jederzeit neu gewählt werden (andere FTP/HFmax), es wird nur umsortiert.
+    Rückgabe: Array der Form ``(..., zonen)``.
+    """
+    hist = np.asarray(hist, dtype=np.int64)
+    csum = np.concatenate((np.zeros(hist.shape[:-1] + (1,), dtype=np.int64), np.cumsum(hist, axis=-1)), axis=-1)
+    edges = np.clip(zone_edges(zones), 0, hist.shape[-1])
+    edges = np.append(edges, hist.shape[-1])
+    at = csum[..., edges]
+    return np.diff(at, axis=-1)
+
+
+def zone_table(hist, zones):
+    # {zone: sekunden} für ein einzelnes (ggf. aufsummiertes) Histogramm
+    return dict(zip(zones, time_in_zones(hist, zones).tolist()))